@@ -1,6 +1,8 @@
-import simplekml
+import math
 import os
+import time
 from datetime import datetime
+from xml.sax.saxutils import escape
 
 class RealTimeKML:
     def __init__(self):
@@ -29,6 +31,7 @@ class RealTimeKML:
         full_output_path = os.path.join(save_folder, filename)
 
         # Object KML
+        import simplekml
         kml = simplekml.Kml(name=f"Log {timestamp}")
         linestring = kml.newlinestring(name="Flight Path")
         linestring.coords = self.coordinates
@@ -46,3 +49,146 @@ class RealTimeKML:
         except Exception as e:
             print(f"[ERROR] KML failed to save: {e}")
 
+
+
+# ========================================================================
+# STREAMING WRITER
+# ========================================================================
+EARTH_RADIUS_M = 6371000.0
+
+KML_HEADER = """<?xml version="1.0" encoding="UTF-8"?>
+<kml xmlns="http://www.opengis.net/kml/2.2">
+<Document>
+<name>{name}</name>
+<Style id="track"><LineStyle><color>ffffff00</color><width>4</width></LineStyle></Style>
+"""
+
+KML_FOOTER = "</Document>\n</kml>\n"
+
+PLACEMARK = """<Placemark><name>Flight Path {index}</name><styleUrl>#track</styleUrl>
+<LineString><extrude>1</extrude><altitudeMode>absolute</altitudeMode><coordinates>
+{coordinates}
+</coordinates></LineString></Placemark>
+"""
+
+
+def _offset_m(lat0, lon0, lat, lon):
+    """Local east/north offset (metres) of (lat, lon) from (lat0, lon0)."""
+    k = math.pi / 180 * EARTH_RADIUS_M
+    return (lon - lon0) * k * math.cos(math.radians(lat0)), (lat - lat0) * k
+
+
+class StreamingKMLWriter:
+    """
+    Writes the flight path to disk while flying.
+
+    Points are simplified online with an opening-window Douglas-Peucker
+    variant: a point is dropped while every point since the last kept one
+    stays within h_tolerance_m (horizontal) and v_tolerance_m (altitude) of
+    the straight line from the last kept point to the newest one. Kept
+    points are appended as one LineString placemark per `chunk_points`
+    points or `flush_seconds`, and the closing tags are rewritten after each
+    chunk, so the file is a valid KML document at all times. Memory is
+    bounded by `max_window` + `chunk_points` points.
+    """
+
+    def __init__(self, path, name=None, h_tolerance_m=2.0, v_tolerance_m=1.0,
+                 chunk_points=200, flush_seconds=5.0, max_window=500):
+        if h_tolerance_m < 0 or v_tolerance_m < 0:
+            raise ValueError("tolerances must not be negative.")
+        if chunk_points < 2 or max_window < 2:
+            raise ValueError("chunk_points and max_window must be at least 2.")
+        self.path = path
+        self.h_tolerance = h_tolerance_m
+        self.v_tolerance = v_tolerance_m
+        self.chunk_points = chunk_points
+        self.flush_seconds = flush_seconds
+        self.max_window = max_window
+
+        self._anchor = None     # last kept point (lat, lon, alt)
+        self._window = []       # points received since the anchor
+        self._chunk = []        # kept points not yet on disk
+        self._last_flush = time.monotonic()
+
+        # Counters
+        self.points = 0
+        self.kept = 0
+        self.chunks = 0
+
+        self._file = open(path, "w+", encoding="utf-8")
+        self._file.write(KML_HEADER.format(name=escape(name or os.path.basename(path))))
+        self._body_end = self._file.tell()
+        self._file.write(KML_FOOTER)
+        self._file.flush()
+
+    def _fits(self, end):
+        """True if every point of the window is within tolerance of anchor->end."""
+        lat0, lon0, alt0 = self._anchor
+        ex, ey = _offset_m(lat0, lon0, end[0], end[1])
+        length2 = ex * ex + ey * ey
+        for lat, lon, alt in self._window:
+            px, py = _offset_m(lat0, lon0, lat, lon)
+            t = 0.0 if length2 == 0 else min(1.0, max(0.0, (px * ex + py * ey) / length2))
+            if math.hypot(px - t * ex, py - t * ey) > self.h_tolerance:
+                return False
+            if abs(alt - (alt0 + t * (end[2] - alt0))) > self.v_tolerance:
+                return False
+        return True
+
+    def _keep(self, point):
+        self._anchor = point
+        self._chunk.append(point)
+        self.kept += 1
+
+    def add_point(self, lat, lon, alt):
+        """
+        Input: lat, lon, alt (meter)
+        """
+        point = (lat, lon, alt)
+        self.points += 1
+        if self._anchor is None:
+            self._keep(point)
+        elif self._window and (len(self._window) >= self.max_window or not self._fits(point)):
+            # The previous point is the furthest the line can be stretched
+            self._keep(self._window[-1])
+            self._window = [point]
+        else:
+            self._window.append(point)
+
+        if (len(self._chunk) >= self.chunk_points
+                or time.monotonic() - self._last_flush >= self.flush_seconds):
+            self.flush()
+
+    def flush(self):
+        """Append the kept points as a placemark and rewrite the closing tags."""
+        self._last_flush = time.monotonic()
+        if len(self._chunk) < 2:
+            return
+        coordinates = "\n".join(f"{lon:.7f},{lat:.7f},{alt:.1f}" for lat, lon, alt in self._chunk)
+        self.chunks += 1
+        self._file.seek(self._body_end)
+        self._file.write(PLACEMARK.format(index=self.chunks, coordinates=coordinates))
+        self._body_end = self._file.tell()
+        self._file.write(KML_FOOTER)
+        self._file.truncate()
+        self._file.flush()
+        # Next placemark starts where this one ended
+        self._chunk = self._chunk[-1:]
+
+    def close(self):
+        """Keep the final point, write the last placemark and close the file."""
+        if self._file is None:
+            return
+        if self._window:
+            self._keep(self._window[-1])
+            self._window = []
+        self.flush()
+        self._file.close()
+        self._file = None
+        print(f"[SUKSES] KML saved in: {self.path} ({self.kept}/{self.points} points kept)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
@@ -1,4 +1,6 @@
 # from _future_ import annotations
+import os
+from functools import lru_cache
 from typing import List, Tuple, Dict
 import xml.etree.ElementTree as ET
 
@@ -60,6 +62,16 @@ def parse_kml_polygons(kml_path: str) -> List[List[Tuple[float, float]]]:
 '''
 
 
+@lru_cache(maxsize=16)
+def _cached_polygons(kml_path: str, mtime: float) -> List[List[Tuple[float, float]]]:
+    return parse_kml_polygons(kml_path)
+
+
+def load_polygons(kml_path: str) -> List[List[Tuple[float, float]]]:
+    """parse_kml_polygons, cached until the file changes on disk."""
+    return _cached_polygons(kml_path, os.path.getmtime(kml_path))
+
+
 def point_in_polygon(lon: float, lat: float, poly: List[Tuple[float, float]]) -> bool:
     inside = False
     n = len(poly)
@@ -75,7 +87,38 @@ def point_in_any(lon: float, lat: float, polygons: List[List[Tuple[float, float]
     return any(point_in_polygon(lon, lat, p) for p in polygons)
 
 
+def points_in_any(lon, lat, polygons: List[List[Tuple[float, float]]]):
+    """
+    Vectorized point_in_any: boolean array for arrays of lon/lat, with the
+    same even-odd rule (loop over edges, arrays over points).
+    """
+    import numpy as np
+
+    lon = np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    result = np.zeros(lon.shape, dtype=bool)
+    for poly in polygons:
+        inside = np.zeros(lon.shape, dtype=bool)
+        n = len(poly)
+        for i in range(n):
+            x1, y1 = poly[i]
+            x2, y2 = poly[(i + 1) % n]
+            crosses = (y1 > lat) != (y2 > lat)
+            x_cross = (x2 - x1) * (lat - y1) / ((y2 - y1) or 1e-15) + x1
+            inside ^= crosses & (lon < x_cross)
+        result |= inside
+    return result
+
+
 # ---------- ARC classification logic ----------
+# Set your KML paths here once
+HALIM = "Halim ATZ.kml"
+SOETTA = "Soetta ATZ.kml"
+
+FT_TO_M = 0.3048
+FL600_m = 60000 * FT_TO_M      # ≈ 18,288 m
+FT500_m = 500 * FT_TO_M        # ≈ 152.4 m
+
 def air_risk(lat: float, lon: float, altitude_m: float, grc) -> Tuple[str, Dict[str, str]]:
     """
     Main callable function.
@@ -86,19 +129,12 @@ def air_risk(lat: float, lon: float, altitude_m: float, grc) -> Tuple[str, Dict[
         - reasoning dictionary
     """
 
-    # Set your KML paths here once
-    HALIM = "Halim ATZ.kml"
-    SOETTA = "Soetta ATZ.kml"
-
-    halim_polys = parse_kml_polygons(HALIM)
-    soetta_polys = parse_kml_polygons(SOETTA)
+    halim_polys = load_polygons(HALIM)
+    soetta_polys = load_polygons(SOETTA)
     in_controlled = False
     # Step 2: location
 
     # --- Step 3: altitude branches (revised to follow flowchart) ---
-    FT_TO_M = 0.3048
-    FL600_m = 60000 * FT_TO_M      # ≈ 18,288 m
-    FT500_m = 500 * FT_TO_M        # ≈ 152.4 m
     a = altitude_m
 
     # temporary constants (until you load real data later)
@@ -135,3 +171,45 @@ def air_risk(lat: float, lon: float, altitude_m: float, grc) -> Tuple[str, Dict[
         else:
             arc_label = "ARC-b"
             return in_controlled, arc_label, 1, {"rule": "OPS ≤ 500 ft in Uncontrolled Rural Area → ARC-b"}
+
+
+def air_risk_many(lat, lon, altitude_m, grc):
+    """
+    Vectorized air_risk over arrays of samples, same rules in the same order.
+    grc: integer array, negative where unknown (treated as not urban).
+    Output:
+        - in_controlled (bool array), arc_label (object array), arc (int8
+          array, -1 where no rule applies) and rule text (object array)
+    """
+    import numpy as np
+
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    a = np.asarray(altitude_m, dtype=float)
+    grc = np.asarray(grc)
+
+    in_halim = points_in_any(lon, lat, load_polygons(HALIM))
+    in_soetta = points_in_any(lon, lat, load_polygons(SOETTA)) & ~in_halim
+    outside = ~(in_halim | in_soetta)
+    is_urban = grc >= 6
+
+    # (mask, arc_label, arc, rule); first match wins, as in air_risk
+    branches = [
+        (in_halim, "ARC-d", 3, "Inside Halim (treated as Class C) → ARC-d"),
+        (in_soetta, "ARC-c", 2, "Inside Soetta (Class A) → ARC-c"),
+        (outside & (a > FL600_m), "ARC-b", 1, "OPS > FL600 → ARC-b"),
+        (outside & (FT500_m < a) & (a < FL600_m), "ARC-c", 2,
+         "500 ft < OPS < FL600 in Uncontrolled Airspace → ARC-c"),
+        (outside & (a <= FT500_m) & is_urban, "ARC-c", 2,
+         "OPS ≤ 500 ft AND Controlled or Urban → ARC-c"),
+        (outside & (a <= FT500_m) & ~is_urban, "ARC-b", 1,
+         "OPS ≤ 500 ft in Uncontrolled Rural Area → ARC-b"),
+    ]
+    labels = np.full(lat.shape, None, dtype=object)
+    arc = np.full(lat.shape, -1, dtype=np.int8)
+    rules = np.full(lat.shape, None, dtype=object)
+    for mask, label, level, rule in branches:
+        labels[mask] = label
+        arc[mask] = level
+        rules[mask] = rule
+    return in_halim | in_soetta, labels, arc, rules
@@ -0,0 +1,105 @@
+"""
+Throughput of the flight log writers: flush() after every row (the old
+monitoring loop) versus FlightLogWriter group commit, plain and gzip.
+
+    python -m benchmarks.bench_flight_logger --rows 20000 --rates 100 500 1000
+
+Unpaced runs measure raw rows/s; paced runs write at a fixed sample rate
+and report the producer-side p50/p99 cost of one write. "bytes" is the
+size on disk of all segments.
+"""
+import argparse
+import csv
+import os
+import tempfile
+import time
+
+from flight_logger import FlightLogWriter, LOG_HEADER, log_segments
+
+ROW = [12.345678, -6.272143363952637, 106.87901306152344, 27.116657257080078,
+       65.22311401367188, 31.463993072509766, 6, "ARC-d", 3,
+       "Inside Halim (treated as Class C) → ARC-d"]
+
+
+class FlushPerRowWriter:
+    """Baseline: the csv.writer + flush() per row of the original loop."""
+
+    def __init__(self, path, header):
+        self.path = path
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(header)
+
+    def write(self, row):
+        self._writer.writerow(row)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def run(make_writer, rows, rate_hz=None):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "flight_log_bench.csv")
+        writer = make_writer(path)
+        costs = []
+        period = 1.0 / rate_hz if rate_hz else 0.0
+        start = time.perf_counter()
+        for i in range(rows):
+            if period:
+                delay = start + i * period - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            t0 = time.perf_counter()
+            writer.write(ROW)
+            costs.append(time.perf_counter() - t0)
+        writer.close()
+        elapsed = time.perf_counter() - start
+        size = sum(os.path.getsize(p) for p in log_segments(writer.path))
+    costs.sort()
+    return {
+        "rows_per_s": rows / elapsed,
+        "p50_us": percentile(costs, 0.50) * 1e6,
+        "p99_us": percentile(costs, 0.99) * 1e6,
+        "bytes": size,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000, help="rows per unpaced run")
+    parser.add_argument("--rates", type=float, nargs="*", default=[100, 500, 1000],
+                        help="sample rates (Hz) for the paced runs")
+    parser.add_argument("--seconds", type=float, default=2.0, help="length of each paced run")
+    parser.add_argument("--commit-ms", type=float, default=200)
+    args = parser.parse_args(argv)
+
+    writers = {
+        "flush-per-row": lambda path: FlushPerRowWriter(path, LOG_HEADER),
+        "group-commit": lambda path: FlightLogWriter(path, LOG_HEADER,
+                                                     commit_interval_ms=args.commit_ms),
+        "gzip": lambda path: FlightLogWriter(path, LOG_HEADER, commit_interval_ms=args.commit_ms,
+                                             compress="gzip"),
+    }
+
+    results = {}
+    print(f"{'writer':<14} {'rate':>8} {'rows/s':>10} {'p50 us':>8} {'p99 us':>8} {'bytes':>10}")
+    for rate in [None] + list(args.rates):
+        rows = args.rows if rate is None else int(rate * args.seconds)
+        for name, make_writer in writers.items():
+            r = run(make_writer, rows, rate)
+            results[(name, rate)] = r
+            label = "max" if rate is None else f"{rate:g} Hz"
+            print(f"{name:<14} {label:>8} {r['rows_per_s']:>10.0f} "
+                  f"{r['p50_us']:>8.1f} {r['p99_us']:>8.1f} {r['bytes']:>10}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
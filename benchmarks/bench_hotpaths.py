@@ -0,0 +1,278 @@
+"""
+Micro-benchmarks of the per-sample hot paths: KML parsing, point-in-polygon,
+GRC raster lookup, ARC classification, GETD packing/parsing, KML saving and
+the dashboard update.
+
+    python -m benchmarks.bench_hotpaths
+    python -m benchmarks.bench_hotpaths --label before-refactor --only point_in
+    python -m benchmarks.bench_hotpaths --compare --threshold 0.2
+
+Runs offline on seeded synthetic inputs: ATZ-like polygons written to KML,
+a random iGRC raster in the GRC GeoTIFF's projection (or --grc-tif for the
+real one) and query points around Halim and Soetta. Each case is timed in
+`repeat` rounds long enough to swamp timer resolution; the median time per
+operation is reported and appended to the history (see benchmarks.history).
+"""
+import argparse
+import contextlib
+import io
+import math
+import os
+import statistics
+import struct
+import tempfile
+import time
+
+import numpy as np
+
+import arc_classifier
+import grc_classifier
+import RealTimeKML
+import xpc
+from benchmarks import history
+
+# west, south, east, north of the query points
+AREA = (106.55, -6.35, 107.00, -6.05)
+
+POSITION_DREFS = [
+    "sim/flightmodel/position/latitude",
+    "sim/flightmodel/position/longitude",
+    "sim/flightmodel/position/elevation",
+    "sim/flightmodel/position/psi",
+    "sim/flightmodel/position/groundspeed",
+]
+
+
+# ===========================
+# SYNTHETIC INPUTS
+# ===========================
+def polygons(rng, count, vertices=40):
+    """`count` star-shaped rings of `vertices` points scattered over AREA."""
+    west, south, east, north = AREA
+    rings = []
+    for _ in range(count):
+        lon0, lat0 = rng.uniform(west, east), rng.uniform(south, north)
+        angles = np.sort(rng.uniform(0, 2 * math.pi, vertices))
+        radius = rng.uniform(0.01, 0.04) * rng.uniform(0.7, 1.0, vertices)
+        rings.append(list(zip((lon0 + radius * np.cos(angles)).tolist(),
+                              (lat0 + radius * np.sin(angles)).tolist())))
+    return rings
+
+
+def write_kml(path, rings):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<kml xmlns="http://www.opengis.net/kml/2.2"><Document>\n')
+        for i, ring in enumerate(rings):
+            coords = " ".join(f"{lon:.8f},{lat:.8f},0" for lon, lat in ring + ring[:1])
+            f.write(f"<Placemark><name>zone {i}</name><Polygon><outerBoundaryIs><LinearRing>"
+                    f"<coordinates>{coords}</coordinates></LinearRing></outerBoundaryIs>"
+                    f"</Polygon></Placemark>\n")
+        f.write("</Document></kml>\n")
+
+
+def write_grc_raster(path, rng, pixel_m=100.0):
+    """Random iGRC 0-6 raster in Mollweide covering AREA with a margin."""
+    import rasterio
+    from pyproj import Transformer
+    from rasterio.transform import from_origin
+
+    west, south, east, north = AREA
+    x, y = Transformer.from_crs("EPSG:4326", "ESRI:54009", always_xy=True).transform(
+        [west - 0.1, east + 0.1, west - 0.1, east + 0.1],
+        [south - 0.1, south - 0.1, north + 0.1, north + 0.1])
+    width = int((max(x) - min(x)) / pixel_m) + 1
+    height = int((max(y) - min(y)) / pixel_m) + 1
+    data = rng.integers(0, 7, size=(height, width), dtype=np.uint8)
+    with rasterio.open(path, "w", driver="GTiff", width=width, height=height, count=1,
+                       dtype="uint8", crs="ESRI:54009",
+                       transform=from_origin(min(x), max(y), pixel_m, pixel_m)) as dst:
+        dst.write(data, 1)
+
+
+def getd_response(rows):
+    """The RESP datagram the XPC plugin sends for a GETD of `rows`."""
+    buffer = struct.pack(b"<4sxB", b"RESP", len(rows))
+    for row in rows:
+        buffer += struct.pack("<B{0:d}f".format(len(row)).encode(), len(row), *row)
+    return buffer
+
+
+# ===========================
+# TIMING
+# ===========================
+def measure(fn, ops=1, repeat=5, min_round_s=0.05):
+    """
+    Median and best time per operation (us) of fn(), which performs `ops`
+    operations, over `repeat` rounds of at least min_round_s each.
+    """
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_round_s:
+            break
+        calls *= 2 if elapsed <= 0 else max(2, min(10, int(min_round_s / elapsed) + 1))
+    rounds = [elapsed]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        rounds.append(time.perf_counter() - start)
+    per_op = [r / (calls * ops) * 1e6 for r in rounds]
+    return {"us_per_op": statistics.median(per_op), "best_us": min(per_op),
+            "ops_per_s": 1e6 / statistics.median(per_op), "calls": calls * repeat}
+
+
+# ===========================
+# CASES
+# ===========================
+def cases(tmp, grc_tif=None, seed=0, points=1000):
+    """(name, fn, ops per call) for every benchmark; inputs are built first."""
+    rng = np.random.default_rng(seed)
+    west, south, east, north = AREA
+    lon = rng.uniform(west, east, points)
+    lat = rng.uniform(south, north, points)
+    alt = rng.uniform(0, 600, points)
+    pts = list(zip(lat.tolist(), lon.tolist(), alt.tolist()))
+
+    if grc_tif is None:
+        grc_tif = os.path.join(tmp, "grc.tif")
+        write_grc_raster(grc_tif, rng)
+    engine = grc_classifier._GRC_Engine(grc_tif)
+    grc = engine.get_grc_many(lat, lon)
+
+    # The classifiers read the ATZ KMLs by name; point them at synthetic ones
+    arc_classifier.HALIM = os.path.join(tmp, "halim.kml")
+    arc_classifier.SOETTA = os.path.join(tmp, "soetta.kml")
+    write_kml(arc_classifier.HALIM, polygons(rng, 1))
+    write_kml(arc_classifier.SOETTA, polygons(rng, 1))
+    grc_classifier.grc_engine = engine
+
+    out = []
+    for count in (1, 10, 100):
+        path = os.path.join(tmp, f"zones_{count}.kml")
+        write_kml(path, polygons(rng, count))
+        out.append((f"parse_kml_polygons[{count}]",
+                    lambda path=path: arc_classifier.parse_kml_polygons(path), 1))
+
+    ring = polygons(rng, 1)[0]
+    out.append(("point_in_polygon[40 vertices]",
+                lambda: [arc_classifier.point_in_polygon(x, y, ring) for _, x, y in
+                         zip(range(100), lon.tolist(), lat.tolist())], 100))
+    for count in (1, 10, 100):
+        rings = polygons(rng, count)
+        n = max(10, 1000 // count)
+        out.append((f"point_in_any[{count}]",
+                    lambda rings=rings, n=n: [arc_classifier.point_in_any(x, y, rings) for _, x, y in
+                                              zip(range(n), lon.tolist(), lat.tolist())], n))
+        out.append((f"points_in_any[{count}] x{points}",
+                    lambda rings=rings: arc_classifier.points_in_any(lon, lat, rings), points))
+
+    out += [
+        ("get_grc", lambda: [engine.get_grc(y, x) for y, x, _ in pts[:100]], 100),
+        (f"get_grc_many x{points}", lambda: engine.get_grc_many(lat, lon), points),
+        ("air_risk", lambda: [arc_classifier.air_risk(y, x, a, g) for (y, x, a), g in
+                              zip(pts[:100], grc.tolist())], 100),
+        (f"air_risk_many x{points}", lambda: arc_classifier.air_risk_many(lat, lon, alt, grc),
+         points),
+    ]
+
+    response = getd_response([[-6.27], [106.88], [300.0], [90.0], [45.0]])
+    out += [
+        ("packDREFs x5", lambda: xpc.XPlaneConnect.packDREFs(POSITION_DREFS), 1),
+        ("parseDREFs x5", lambda: xpc.XPlaneConnect.parseDREFs(response), 1),
+    ]
+
+    kml = RealTimeKML.RealTimeKML()
+    for y, x, a in pts:
+        kml.add_point(y, x, a)
+
+    def save_kml():
+        with contextlib.redirect_stdout(io.StringIO()):
+            kml.save_kml(tmp)
+
+    def stream_kml():
+        with contextlib.redirect_stdout(io.StringIO()), RealTimeKML.StreamingKMLWriter(os.path.join(tmp, "stream.kml")) as writer:
+            for y, x, a in pts:
+                writer.add_point(y, x, a)
+
+    out += [
+        (f"save_kml x{points}", save_kml, points),
+        (f"StreamingKMLWriter x{points}", stream_kml, points),
+    ]
+    return out
+
+
+def dashboard_cases(seed=0):
+    """plotting with the Agg backend; the population panel is left out."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import plotting
+
+    plotting.pop_path = ""
+    rng = np.random.default_rng(seed)
+    state = {"t": 0.0}
+
+    def update():
+        state["t"] += 0.5
+        plotting.update_dashboard(state["t"], int(rng.integers(0, 4)), int(rng.integers(1, 9)),
+                                  "rule", "ARC-c", -6.27, 106.88)
+
+    def frame():
+        update()
+        plotting.render(force=True)
+
+    for _ in range(5):
+        frame()  # builds the figure and caches the backgrounds
+    return [("update_dashboard", update, 1), ("dashboard frame", frame, 1)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="timed rounds per case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--grc-tif", help="GRC GeoTIFF to use instead of a synthetic raster")
+    parser.add_argument("--only", help="run only the cases whose name contains this text")
+    parser.add_argument("--no-dashboard", action="store_true", help="skip the matplotlib cases")
+    parser.add_argument("--history", default=history.DEFAULT_HISTORY)
+    parser.add_argument("--no-history", action="store_true", help="do not record this run")
+    parser.add_argument("--label", help="name of this run in the history")
+    parser.add_argument("--compare", action="store_true",
+                        help="compare with the previous run on the same machine and Python")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="relative slowdown flagged as a regression")
+    args = parser.parse_args(argv)
+
+    results = {}
+    print(f"{'case':<34} {'us/op':>11} {'best us':>11} {'ops/s':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        with contextlib.redirect_stdout(io.StringIO()):
+            all_cases = cases(tmp, args.grc_tif, args.seed)
+            if not args.no_dashboard:
+                all_cases += dashboard_cases(args.seed)
+        for name, fn, ops in all_cases:
+            if args.only and args.only not in name:
+                continue
+            r = measure(fn, ops, args.repeat)
+            results[name] = r
+            print(f"{name:<34} {r['us_per_op']:>11.3f} {r['best_us']:>11.3f} {r['ops_per_s']:>12.0f}")
+
+    if args.no_history:
+        return results
+    entry = history.append(results, args.history, args.label)
+    print(f"Recorded in {args.history}")
+    if args.compare:
+        base = history.baseline(history.load(args.history), entry)
+        print()
+        if base is None:
+            print(f"No earlier run on {entry['machine']} with Python {entry['python']} to compare with.")
+        elif history.report(base, entry, args.threshold):
+            raise SystemExit(1)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+End-to-end benchmark of the xpc client against the local XPC emulator.
+
+    python -m benchmarks.bench_xpc --iterations 2000 --latency 1 --jitter 2 --loss 0.01
+
+Reports throughput and p50/p99 round-trip latency for each client API.
+"""
+import argparse
+import socket
+import time
+
+import numpy as np
+
+import xpc
+from xpc_emulator import Trajectory, XPCEmulator
+
+POSITION_DREFS = [
+    "sim/flightmodel/position/latitude",
+    "sim/flightmodel/position/longitude",
+    "sim/flightmodel/position/elevation",
+    "sim/flightmodel/position/psi",
+    "sim/flightmodel/position/groundspeed",
+]
+
+# Payloads of the bulk write cases
+BULK_POINTS = np.column_stack([np.linspace(-6.3, -6.1, 2000),
+                               np.linspace(106.6, 106.9, 2000),
+                               np.full(2000, 300.0)])
+BULK_DREFS = [f"sim/test/bench_dref_{i:03d}" for i in range(500)]
+BULK_VALUES = np.arange(500, dtype=float).reshape(-1, 1)
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return float("nan")
+    k = (len(sorted_values) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def cases(client):
+    """(name, callable) for every client API exercised by the benchmark."""
+    return [
+        ("getDREF", lambda: client.getDREF(POSITION_DREFS[0])),
+        ("getDREFs x5", lambda: client.getDREFs(POSITION_DREFS)),
+        ("getPOSI", lambda: client.getPOSI(0)),
+        ("getPOSIs x20", lambda: client.getPOSIs(range(20))),
+        ("getCTRL", lambda: client.getCTRL(0)),
+        ("sendDREF", lambda: client.sendDREF("sim/operation/override/override_planepath", 1)),
+        ("sendPOSI", lambda: client.sendPOSI([-6.27, 106.88, 300.0, 0, 0, 90, 1], 1)),
+        ("sendCTRL", lambda: client.sendCTRL([0.0, 0.0, 0.0, 0.8, 1, 0.0, 0.0])),
+        ("sendDATA", lambda: client.sendDATA([[25, 0.8, -998, -998, -998, -998, -998, -998, -998]])),
+        ("sendWYPT", lambda: client.sendWYPT(1, [-6.27, 106.88, 300.0])),
+        ("sendWYPTBulk x2000", lambda: client.sendWYPTBulk(1, BULK_POINTS)),
+        ("sendDREFsBulk x500", lambda: client.sendDREFsBulk(BULK_DREFS, BULK_VALUES)),
+    ]
+
+
+def run_case(fn, iterations):
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        try:
+            fn()
+        except (socket.timeout, ValueError):
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "calls_per_s": iterations / elapsed if elapsed > 0 else float("inf"),
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "errors": errors,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.0, help="emulated latency (ms)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="emulated jitter (ms)")
+    parser.add_argument("--loss", type=float, default=0.0, help="emulated reply loss probability")
+    parser.add_argument("--timeout", type=int, default=100, help="client timeout (ms)")
+    parser.add_argument("--retries", type=int, default=0, help="client retries per request")
+    parser.add_argument("--adaptive", action="store_true", help="use adaptive client timeouts")
+    parser.add_argument("--log", help="flight_log_*.csv to drive the emulator")
+    parser.add_argument("--only", help="run only the cases whose name contains this text")
+    args = parser.parse_args(argv)
+
+    trajectory = Trajectory.from_csv(args.log) if args.log else None
+    emulator = XPCEmulator(trajectory=trajectory, latency_ms=args.latency,
+                           jitter_ms=args.jitter, loss=args.loss, seed=0)
+    results = {}
+    with emulator:
+        host, port = emulator.address
+        with xpc.XPlaneConnect(host, port, timeout=args.timeout, retries=args.retries,
+                               adaptiveTimeout=args.adaptive) as client:
+            print(f"{'case':<20} {'calls/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+            for name, fn in cases(client):
+                if args.only and args.only not in name:
+                    continue
+                r = run_case(fn, args.iterations)
+                results[name] = r
+                print(f"{name:<20} {r['calls_per_s']:>10.0f} {r['p50_ms']:>9.3f} "
+                      f"{r['p99_ms']:>9.3f} {r['errors']:>7d}")
+            print("client stats:", client.getStats())
+    return results
+
+
+if __name__ == "__main__":
+    main()
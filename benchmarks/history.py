@@ -0,0 +1,144 @@
+"""
+Benchmark history: runs appended to a JSON file and compared against each
+other.
+
+    python -m benchmarks.history --history benchmarks/history.json
+    python -m benchmarks.history --base -3 --threshold 0.2
+
+Every entry holds the per-case median time per operation of one run, plus
+the commit, Python version and machine it ran on. Timings are only
+comparable on the same machine and Python, so the default baseline is the
+previous run that matches both (see baseline()). compare() flags the cases
+that got slower than the baseline by more than the threshold (0.15 = 15 %).
+The command exits with status 1 when there are regressions, so it can gate
+CI. The history is local to the checkout and not committed.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+DEFAULT_HISTORY = os.path.join(os.path.dirname(__file__), "history.json")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def load(path=DEFAULT_HISTORY):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def append(results, path=DEFAULT_HISTORY, label=None):
+    """Add a run ({case: {"us_per_op": ...}}) to the history; returns the entry."""
+    entry = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "label": label,
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()} ({os.cpu_count()} CPU)",
+        "results": results,
+    }
+    history = load(path) + [entry]
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(history, f, indent=1)
+    os.replace(tmp, path)
+    return entry
+
+
+def find(history, ref):
+    """Entry by index (as in a list, -1 is the newest) or by label."""
+    if not history:
+        raise ValueError("The benchmark history is empty.")
+    try:
+        return history[int(ref)]
+    except ValueError:
+        pass
+    except IndexError:
+        raise ValueError(f"No run {ref} in a history of {len(history)} runs.")
+    for entry in reversed(history):
+        if entry.get("label") == ref:
+            return entry
+    raise ValueError(f"No run labelled '{ref}' in the history.")
+
+
+def baseline(history, new):
+    """Newest run before `new` on the same machine and Python version, or None."""
+    older = history[:history.index(new)] if new in history else history
+    for entry in reversed(older):
+        if entry.get("machine") == new.get("machine") and entry.get("python") == new.get("python"):
+            return entry
+    return None
+
+
+def compare(base, new, threshold=0.15):
+    """
+    (case, base us, new us, change) for every case in both runs, change being
+    the relative increase in time per operation, and the list of regressions
+    (change > threshold).
+    """
+    rows = []
+    for case, result in new["results"].items():
+        old = base["results"].get(case)
+        if not old or not old.get("us_per_op"):
+            continue
+        change = result["us_per_op"] / old["us_per_op"] - 1
+        rows.append((case, old["us_per_op"], result["us_per_op"], change))
+    return rows, [row for row in rows if row[3] > threshold]
+
+
+def describe(entry):
+    label = f" '{entry['label']}'" if entry.get("label") else ""
+    return f"{entry['time']}{label} @ {entry.get('commit') or '?'}"
+
+
+def report(base, new, threshold=0.15):
+    """Print the comparison table; returns the regressions."""
+    rows, regressions = compare(base, new, threshold)
+    print(f"base: {describe(base)}\nnew:  {describe(new)}")
+    if (base.get("machine"), base.get("python")) != (new.get("machine"), new.get("python")):
+        print("WARNING: the runs are from different machines or Python versions")
+    print(f"{'case':<34} {'base us':>11} {'new us':>11} {'change':>8}")
+    for case, old, now, change in rows:
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{case:<34} {old:>11.3f} {now:>11.3f} {change:>+8.1%}{flag}")
+    print(f"{len(regressions)} of {len(rows)} cases slower by more than {threshold:.0%}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--history", default=DEFAULT_HISTORY)
+    parser.add_argument("--base", help="baseline run: index or label (default: the previous "
+                                       "run on the same machine and Python)")
+    parser.add_argument("--new", default="-1", help="run to check: index or label (default: -1)")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="relative slowdown flagged as a regression")
+    args = parser.parse_args(argv)
+
+    history = load(args.history)
+    try:
+        new = find(history, args.new)
+        base = find(history, args.base) if args.base else baseline(history, new)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return 2
+    if base is None:
+        print(f"ERROR: No earlier run on {new.get('machine')} with Python {new.get('python')}.")
+        return 2
+    return 1 if report(base, new, args.threshold) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
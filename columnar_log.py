@@ -0,0 +1,287 @@
+"""
+Append-only columnar flight log (.p2mc).
+
+Layout (little endian):
+    header  "P2MICOL1", uint32 schema length, schema JSON, padding to 8 bytes
+    chunk   "CHNK", uint32 rows, uint32 new dictionary entries,
+            dictionary entries (uint8 column, uint16 code, uint16 length, UTF-8),
+            padding to 8 bytes, then one array per column (rows * itemsize,
+            each padded to 8 bytes)
+
+Text columns (arc_label, arc_rule) are stored as uint16 dictionary codes;
+new dictionary values are declared in the chunk that first uses them, so
+the file can be appended to during flight and every complete chunk is
+readable after a crash. Column arrays are 8-byte aligned and read straight
+from a memory map.
+"""
+import json
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+
+from flight_logger import ARC_LEVELS, log_stem, read_log
+
+MAGIC = b"P2MICOL1"
+CHUNK_MAGIC = b"CHNK"
+CHUNK_HEADER = struct.Struct("<4sII")
+DICT_ENTRY = struct.Struct("<BHH")
+
+# Column name, dtype, dictionary encoded
+COLUMNS = [
+    ("t_sec", "<f8", False),
+    ("lat", "<f8", False),
+    ("lon", "<f8", False),
+    ("alt_m", "<f4", False),
+    ("hdg_deg", "<f4", False),
+    ("spd_mps", "<f4", False),
+    ("grc", "<i1", False),
+    ("arc_label", "<u2", True),
+    ("arc", "<i1", False),
+    ("arc_rule", "<u2", True),
+]
+
+# Stored for missing integer values (e.g. grc/arc in the old log schema)
+MISSING = -1
+
+
+def _pad(n):
+    return (-n) % 8
+
+
+class ColumnarLogWriter:
+    """
+    Buffers rows (in the order of flight_logger.LOG_HEADER) and appends them
+    as a chunk every `chunk_rows` rows or `chunk_seconds` seconds.
+    """
+
+    def __init__(self, path, chunk_rows=1024, chunk_seconds=5.0):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.chunk_seconds = chunk_seconds
+
+        self._file = open(path, "wb")
+        schema = json.dumps({"columns": [
+            {"name": name, "dtype": dtype, "dictionary": dictionary}
+            for name, dtype, dictionary in COLUMNS]}).encode()
+        header = MAGIC + struct.pack("<I", len(schema)) + schema
+        self._file.write(header + b"\0" * _pad(len(header)))
+        self._file.flush()
+
+        self._columns = [[] for _ in COLUMNS]
+        self._dictionaries = {i: {} for i, c in enumerate(COLUMNS) if c[2]}
+        self._new_entries = []
+        self._last_chunk = time.monotonic()
+        self.rows = 0
+        self.chunks = 0
+
+    def _encode(self, index, value):
+        codes = self._dictionaries[index]
+        value = "" if value is None else str(value)
+        code = codes.get(value)
+        if code is None:
+            code = len(codes)
+            if code > 0xFFFF:
+                raise ValueError(f"too many distinct values in column {COLUMNS[index][0]}.")
+            codes[value] = code
+            self._new_entries.append((index, code, value.encode()))
+        return code
+
+    def write(self, row):
+        for i, value in enumerate(row):
+            if COLUMNS[i][2]:
+                value = self._encode(i, value)
+            elif value is None:
+                value = MISSING
+            self._columns[i].append(value)
+        if (len(self._columns[0]) >= self.chunk_rows
+                or time.monotonic() - self._last_chunk >= self.chunk_seconds):
+            self.flush()
+
+    def flush(self):
+        """Append the buffered rows as one chunk."""
+        self._last_chunk = time.monotonic()
+        rows = len(self._columns[0])
+        if rows == 0:
+            return
+
+        parts = [CHUNK_HEADER.pack(CHUNK_MAGIC, rows, len(self._new_entries))]
+        for index, code, value in self._new_entries:
+            parts.append(DICT_ENTRY.pack(index, code, len(value)))
+            parts.append(value)
+        size = sum(len(p) for p in parts)
+        parts.append(b"\0" * _pad(size))
+
+        for values, (_, dtype, _) in zip(self._columns, COLUMNS):
+            data = np.asarray(values, dtype=dtype).tobytes()
+            parts.append(data)
+            parts.append(b"\0" * _pad(len(data)))
+
+        self._file.write(b"".join(parts))
+        self._file.flush()
+        self._columns = [[] for _ in COLUMNS]
+        self._new_entries = []
+        self.rows += rows
+        self.chunks += 1
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+
+class ColumnarLog:
+    """
+    Memory-mapped reader. column(name) returns a NumPy array (zero-copy for
+    single-chunk files), labels(name) decodes a dictionary column.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < len(MAGIC) + 4:
+            self._file.close()
+            raise ValueError(f"'{path}' is not a columnar flight log.")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"'{path}' is not a columnar flight log.")
+
+        (schema_len,) = struct.unpack_from("<I", self._map, len(MAGIC))
+        start = len(MAGIC) + 4
+        schema = json.loads(self._map[start:start + schema_len].decode())
+        self.columns = [(c["name"], np.dtype(c["dtype"]), c["dictionary"])
+                        for c in schema["columns"]]
+        self._index = {c[0]: i for i, c in enumerate(self.columns)}
+        self.dictionaries = {i: [] for i, c in enumerate(self.columns) if c[2]}
+
+        offset = start + schema_len
+        offset += _pad(offset)
+        self._chunks = []
+        self._scan(offset, size)
+
+    def _scan(self, offset, size):
+        """Index every complete chunk; a partial chunk at the end is ignored."""
+        while offset + CHUNK_HEADER.size <= size:
+            magic, rows, entries = CHUNK_HEADER.unpack_from(self._map, offset)
+            if magic != CHUNK_MAGIC:
+                break
+            pos = offset + CHUNK_HEADER.size
+            new = []
+            for _ in range(entries):
+                if pos + DICT_ENTRY.size > size:
+                    return
+                index, code, length = DICT_ENTRY.unpack_from(self._map, pos)
+                pos += DICT_ENTRY.size
+                new.append((index, code, self._map[pos:pos + length].decode()))
+                pos += length
+            pos += _pad(pos - offset)
+
+            arrays = []
+            for _, dtype, _ in self.columns:
+                nbytes = rows * dtype.itemsize
+                arrays.append((pos, nbytes))
+                pos += nbytes + _pad(nbytes)
+            if pos > size:
+                return
+
+            for index, code, value in new:
+                self.dictionaries[index].append(value)
+            self._chunks.append((rows, arrays))
+            offset = pos
+
+    def __len__(self):
+        return sum(rows for rows, _ in self._chunks)
+
+    def column(self, name):
+        """
+        Values of a column as an array of its own: always copied out of the
+        map, so it can outlive the reader and close() never finds the map
+        still exported.
+        """
+        i = self._index[name]
+        dtype = self.columns[i][1]
+        parts = [np.frombuffer(self._map, dtype=dtype, count=rows, offset=arrays[i][0])
+                 for rows, arrays in self._chunks]
+        if not parts:
+            return np.empty(0, dtype=dtype)
+        return parts[0].copy() if len(parts) == 1 else np.concatenate(parts)
+
+    def labels(self, name):
+        """Decoded values of a dictionary column as a NumPy object array."""
+        i = self._index[name]
+        dictionary = np.array(self.dictionaries[i], dtype=object)
+        return dictionary[self.column(name)]
+
+    def to_rows(self):
+        """Rows in the order of flight_logger.LOG_HEADER (None for missing values)."""
+        cols = []
+        for name, dtype, dictionary in self.columns:
+            if dictionary:
+                cols.append(self.labels(name).tolist())
+            elif dtype.kind == "i":
+                cols.append([None if v == MISSING else v for v in self.column(name).tolist()])
+            else:
+                cols.append(self.column(name).tolist())
+        return list(zip(*cols))
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+
+def convert_csv(csv_path, out_path=None):
+    """
+    Convert a flight_log_*.csv (old 8-column or current 10-column schema)
+    to the columnar format. For old logs the ARC level is derived from the
+    label and the GRC is stored as missing. Returns the output path.
+    """
+    if out_path is None:
+        out_path = log_stem(csv_path) + ".p2mc"
+    with ColumnarLogWriter(out_path, chunk_rows=65536, chunk_seconds=float("inf")) as writer:
+        for r in read_log(csv_path):
+            arc = r["arc"]
+            if arc is None:
+                arc = ARC_LEVELS.get(r["arc_label"])
+            writer.write((r["t_sec"], r["lat"], r["lon"], r["alt_m"], r["hdg_deg"],
+                          r["spd_mps"], r["grc"], r["arc_label"], arc, r["arc_rule"]))
+    return out_path
+
+
+# ========================================================================
+# python columnar_log.py logs/flight_log_*.csv [--out folder]
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert CSV flight logs to .p2mc")
+    parser.add_argument("logs", nargs="+")
+    parser.add_argument("--out", help="output folder (default: next to each log)")
+    args = parser.parse_args()
+
+    for path in args.logs:
+        out = None
+        if args.out:
+            os.makedirs(args.out, exist_ok=True)
+            out = os.path.join(args.out, os.path.basename(log_stem(path)) + ".p2mc")
+        out = convert_csv(path, out)
+        print(f"{path} ({os.path.getsize(path)} B) -> {out} ({os.path.getsize(out)} B)")
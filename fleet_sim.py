@@ -0,0 +1,194 @@
+"""
+Monte Carlo fleet simulator: synthetic operations around Halim and Soetta
+classified without X-Plane, as a risk study and a load test of the
+classifiers.
+
+    python p2mi.py simulate --flights 5000 --seed 1
+    python p2mi.py simulate --flights 200 --scalar --workers 1
+
+Every flight is a random route of 1-4 legs through AREA at a random speed
+and cruise altitude, sampled at rate_hz with jittered spacing like the live
+loop. Flights are classified in batches (one final_grc_many/air_risk_many
+call per batch, or per-sample final_grc/air_risk with scalar=True) spread
+over a process pool. The GRC raster and the ATZ polygons are loaded once in
+the parent and inherited by forked workers; where fork is unavailable each
+worker loads them once in its initializer. Batches are seeded from one
+SeedSequence, so results do not depend on the number of workers.
+"""
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import arc_classifier
+import grc_classifier
+
+# west, south, east, north: both ATZs with a margin of uncontrolled airspace
+AREA = (106.45, -6.45, 107.10, -5.95)
+
+SPEED_MPS = (15.0, 70.0)
+LOW_ALT_M = (20.0, arc_classifier.FT500_m)   # below 500 ft
+HIGH_ALT_M = (arc_classifier.FT500_m, 1500.0)
+LOW_FRACTION = 0.6                           # flights cruising below 500 ft
+CLIMB_M = 2000.0                             # climb/descent distance at each end
+
+M_PER_DEG = 111320.0
+ARC_NAMES = ("ARC-a", "ARC-b", "ARC-c", "ARC-d")
+GRC_CLASSES = 9                              # Final GRC 0..8
+
+
+def trajectory(rng, rate_hz=2, jitter=0.3):
+    """(t, lat, lon, alt_m) arrays of one random flight."""
+    west, south, east, north = AREA
+    waypoints = rng.uniform((west, south), (east, north), size=(rng.integers(2, 6), 2))
+    # Local metres along the route, good enough at this scale
+    scale = np.array([M_PER_DEG * math.cos(math.radians((south + north) / 2)), M_PER_DEG])
+    legs = np.hypot(*((np.diff(waypoints, axis=0) * scale).T))
+    route = np.concatenate(([0.0], np.cumsum(legs)))
+
+    speed = rng.uniform(*SPEED_MPS)
+    # Enough jittered intervals to cover the route, cut after the one that reaches its end
+    n = int(route[-1] / speed * rate_hz * (1 + jitter)) + 2
+    dt = (1 + jitter * rng.uniform(-1, 1, n)) / rate_hz
+    t = np.concatenate(([0.0], np.cumsum(dt[1:])))
+    s = np.minimum(t * speed, route[-1])
+    end = np.searchsorted(s, route[-1]) + 1
+    t, s = t[:end], s[:end]
+
+    lon = np.interp(s, route, waypoints[:, 0])
+    lat = np.interp(s, route, waypoints[:, 1])
+    cruise = rng.uniform(*(LOW_ALT_M if rng.random() < LOW_FRACTION else HIGH_ALT_M))
+    alt = cruise * np.clip(np.minimum(s, route[-1] - s) / CLIMB_M, 0.05, 1.0)
+    return t, lat, lon, alt
+
+
+def _load_geodata():
+    """Pool initializer; a no-op in forked workers that inherited the parent's."""
+    grc_classifier.get_engine()
+    arc_classifier.load_polygons(arc_classifier.HALIM)
+    arc_classifier.load_polygons(arc_classifier.SOETTA)
+
+
+def _classify_scalar(lat, lon, alt):
+    grc = np.empty(len(lat), dtype=np.int8)
+    arc = np.empty(len(lat), dtype=np.int8)
+    for i, (la, lo, a) in enumerate(zip(lat.tolist(), lon.tolist(), alt.tolist())):
+        g = grc_classifier.final_grc(la, lo)
+        g = -1 if g is None else g
+        result = arc_classifier.air_risk(la, lo, a, g)
+        grc[i] = g
+        arc[i] = -1 if result is None else result[2]
+    return grc, arc
+
+
+def run_batch(seed, flights, rate_hz=2, scalar=False):
+    """
+    Generate and classify `flights` flights from `seed`. Returns partial
+    totals that add up across batches (see simulate).
+    """
+    rng = np.random.default_rng(seed)
+    tracks = [trajectory(rng, rate_hz) for _ in range(flights)]
+    starts = np.cumsum([0] + [len(tr[0]) for tr in tracks[:-1]])
+    t, lat, lon, alt = (np.concatenate(col) for col in zip(*tracks))
+
+    start = time.perf_counter()
+    if scalar:
+        grc, arc = _classify_scalar(lat, lon, alt)
+    else:
+        grc = grc_classifier.final_grc_many(lat, lon)
+        _, _, arc, _ = arc_classifier.air_risk_many(lat, lon, alt, grc)
+    classify_s = time.perf_counter() - start
+
+    # Sample-and-hold: a sample lasts until the next one of the same flight
+    held = np.diff(t, append=0.0)
+    last = np.append(starts[1:] - 1, len(t) - 1)
+    held[last] = 0.0
+    same_flight = np.ones(len(t), dtype=bool)
+    same_flight[starts] = False
+    return {
+        "flights": flights,
+        "samples": len(t),
+        "flight_s": float(held.sum()),
+        "classify_s": classify_s,
+        # Index 0 of the exposure arrays is "unknown" (-1)
+        "arc_s": np.bincount(arc.astype(np.int64) + 1, weights=held, minlength=len(ARC_NAMES) + 1),
+        "grc_s": np.bincount(grc.astype(np.int64) + 1, weights=held, minlength=GRC_CLASSES + 1),
+        "arc_transitions": int(np.count_nonzero(same_flight[1:] & (arc[1:] != arc[:-1]))),
+        "grc_transitions": int(np.count_nonzero(same_flight[1:] & (grc[1:] != grc[:-1]))),
+        "max_arc": np.bincount(np.maximum.reduceat(arc, starts).astype(np.int64) + 1,
+                               minlength=len(ARC_NAMES) + 1),
+        "max_grc": np.bincount(np.maximum.reduceat(grc, starts).astype(np.int64) + 1,
+                               minlength=GRC_CLASSES + 1),
+    }
+
+
+def _pool(workers):
+    try:
+        context = multiprocessing.get_context("fork")
+    except ValueError:
+        context = None  # Windows: spawned workers load the geodata themselves
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                               initializer=_load_geodata)
+
+
+def simulate(flights=1000, workers=None, seed=0, rate_hz=2, batch=50, scalar=False,
+             progress=None):
+    """
+    Classify `flights` random flights in batches of `batch` (workers=None:
+    one process per CPU, 1: in this process). progress(done, total) is
+    called as batches finish. Returns the report dict.
+    """
+    if flights <= 0 or batch <= 0:
+        raise ValueError("flights and batch must be positive.")
+    sizes = [min(batch, flights - i) for i in range(0, flights, batch)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    start = time.perf_counter()
+    _load_geodata()
+    load_s = time.perf_counter() - start
+
+    total = None
+    workers = workers or os.cpu_count()
+    pool = None if workers == 1 else _pool(workers)
+    try:
+        if pool is None:
+            results = (run_batch(s, n, rate_hz, scalar) for s, n in zip(seeds, sizes))
+        else:
+            results = pool.map(run_batch, seeds, sizes, [rate_hz] * len(sizes),
+                               [scalar] * len(sizes))
+        done = 0
+        for part in results:
+            total = part if total is None else {k: total[k] + part[k] for k in total}
+            done += part["flights"]
+            if progress:
+                progress(done, flights)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    wall_s = time.perf_counter() - start - load_s
+
+    flight_s = max(total["flight_s"], 1e-9)
+    hours = flight_s / 3600
+    labels = ["unknown"] + list(ARC_NAMES)
+    classes = ["unknown"] + [str(g) for g in range(GRC_CLASSES)]
+    return {
+        "flights": total["flights"],
+        "samples": total["samples"],
+        "flight_hours": round(hours, 2),
+        "mode": "scalar" if scalar else "vectorized",
+        "workers": workers,
+        "load_s": round(load_s, 3),
+        "wall_s": round(wall_s, 3),
+        "samples_per_s": round(total["samples"] / max(wall_s, 1e-9)),
+        # Classification alone, summed over workers: the per-core engine throughput
+        "classify_samples_per_s": round(total["samples"] / max(total["classify_s"], 1e-9)),
+        "arc_exposure": {k: round(v / flight_s, 4) for k, v in zip(labels, total["arc_s"]) if v},
+        "grc_exposure": {k: round(v / flight_s, 4) for k, v in zip(classes, total["grc_s"]) if v},
+        "arc_transitions_per_hour": round(total["arc_transitions"] / max(hours, 1e-9), 2),
+        "grc_transitions_per_hour": round(total["grc_transitions"] / max(hours, 1e-9), 2),
+        "flights_by_max_arc": {k: int(v) for k, v in zip(labels, total["max_arc"]) if v},
+        "flights_by_max_grc": {k: int(v) for k, v in zip(classes, total["max_grc"]) if v},
+    }
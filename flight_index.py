@@ -0,0 +1,244 @@
+"""
+SQLite index of the flight log archive.
+
+    python p2mi.py index logs/flight_log_*.csv
+    python p2mi.py query --zone soetta --max-alt 152.4
+    python p2mi.py query --min-grc 7 --flights
+
+Every log becomes one row in `flights` and a run of samples with the same
+ARC, GRC and rule (at most SEGMENT_SAMPLES long) one row in `segments`.
+The segments' lon/lat/altitude boxes go into an R*Tree, and ARC, GRC, zone
+and start time are indexed, so queries never touch the CSVs. Ingest is
+incremental: logs whose files (the manifest and every segment of a
+segmented log) keep their total size and newest modification time are
+skipped, changed logs are re-indexed.
+"""
+import os
+import sqlite3
+import time
+
+from flight_logger import ARC_LEVELS, log_segments, read_log
+
+DEFAULT_DB = os.path.join("logs", "flight_index.sqlite")
+
+# Longest segment, keeps the bounding boxes of long straight legs tight
+SEGMENT_SAMPLES = 50
+
+ZONES = {"halim": "Inside Halim", "soetta": "Inside Soetta"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS flights (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER, mtime REAL, ingested REAL,
+    samples INTEGER, duration_s REAL,
+    min_lat REAL, max_lat REAL, min_lon REAL, max_lon REAL, max_alt REAL,
+    max_grc INTEGER, max_arc INTEGER
+);
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    flight_id INTEGER NOT NULL REFERENCES flights(id),
+    t_start REAL, t_end REAL, samples INTEGER,
+    arc INTEGER, arc_label TEXT, grc INTEGER, zone TEXT, rule TEXT,
+    min_alt REAL, max_alt REAL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS segment_box USING rtree(
+    id, min_lon, max_lon, min_lat, max_lat, min_alt, max_alt
+);
+CREATE INDEX IF NOT EXISTS segments_flight ON segments(flight_id);
+CREATE INDEX IF NOT EXISTS segments_arc ON segments(arc);
+CREATE INDEX IF NOT EXISTS segments_grc ON segments(grc);
+CREATE INDEX IF NOT EXISTS segments_zone ON segments(zone, min_alt);
+CREATE INDEX IF NOT EXISTS segments_time ON segments(flight_id, t_start);
+"""
+
+
+def zone_of(rule):
+    for zone, prefix in ZONES.items():
+        if rule and rule.startswith(prefix):
+            return zone
+    return None
+
+
+def change_key(path):
+    """
+    (total size, newest mtime) of a log's files. Segments are appended to
+    without rewriting the manifest, so the manifest's own stat is not enough.
+    """
+    files = [path] + [f for f in log_segments(path) if f != path]
+    stats = [os.stat(f) for f in files]
+    return sum(st.st_size for st in stats), max(st.st_mtime for st in stats)
+
+
+def summarise(path):
+    """(flight row values, segment list) of one log in a single pass."""
+    segments = []
+    seg = None
+    flight = {"samples": 0, "t0": None, "t1": None, "min_lat": None, "max_lat": None,
+              "min_lon": None, "max_lon": None, "max_alt": None, "max_grc": None,
+              "max_arc": None}
+    for r in read_log(path):
+        arc = r["arc"] if r["arc"] is not None else ARC_LEVELS.get(r["arc_label"])
+        key = (arc, r["grc"], r["arc_rule"])
+        if seg is None or seg["key"] != key or seg["samples"] >= SEGMENT_SAMPLES:
+            if seg is not None:
+                seg["t1"] = r["t_sec"]  # a segment lasts until the next one starts
+            seg = {"key": key, "label": r["arc_label"], "samples": 0, "t0": r["t_sec"],
+                   "min_lat": r["lat"], "max_lat": r["lat"], "min_lon": r["lon"],
+                   "max_lon": r["lon"], "min_alt": r["alt_m"], "max_alt": r["alt_m"]}
+            segments.append(seg)
+        seg["samples"] += 1
+        seg["t1"] = r["t_sec"]
+        for box in (seg, flight):
+            box["min_lat"] = r["lat"] if box["min_lat"] is None else min(box["min_lat"], r["lat"])
+            box["max_lat"] = r["lat"] if box["max_lat"] is None else max(box["max_lat"], r["lat"])
+            box["min_lon"] = r["lon"] if box["min_lon"] is None else min(box["min_lon"], r["lon"])
+            box["max_lon"] = r["lon"] if box["max_lon"] is None else max(box["max_lon"], r["lon"])
+        seg["min_alt"] = min(seg["min_alt"], r["alt_m"])
+        seg["max_alt"] = max(seg["max_alt"], r["alt_m"])
+
+        flight["samples"] += 1
+        if flight["t0"] is None:
+            flight["t0"] = r["t_sec"]
+        flight["t1"] = r["t_sec"]
+        flight["max_alt"] = r["alt_m"] if flight["max_alt"] is None else max(flight["max_alt"], r["alt_m"])
+        if r["grc"] is not None:
+            flight["max_grc"] = max(flight["max_grc"] or 0, r["grc"])
+        if arc is not None:
+            flight["max_arc"] = max(flight["max_arc"] or 0, arc)
+    return flight, segments
+
+
+class FlightIndex:
+    """The archive database; ingest() adds logs, segments()/flights() query it."""
+
+    def __init__(self, db_path=DEFAULT_DB):
+        folder = os.path.dirname(db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.db = sqlite3.connect(db_path)
+        self.db.row_factory = sqlite3.Row
+        # One transaction per log; WAL keeps each commit to a single sequential write
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("PRAGMA synchronous = NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    # --- Ingest ---
+    def _delete(self, flight_id):
+        self.db.execute("DELETE FROM segment_box WHERE id IN "
+                        "(SELECT id FROM segments WHERE flight_id = ?)", (flight_id,))
+        self.db.execute("DELETE FROM segments WHERE flight_id = ?", (flight_id,))
+        self.db.execute("DELETE FROM flights WHERE id = ?", (flight_id,))
+
+    def ingest(self, path):
+        """Index one log; returns False if it is already indexed and unchanged."""
+        path = os.path.abspath(path)
+        size, mtime = change_key(path)
+        row = self.db.execute("SELECT id, size, mtime FROM flights WHERE path = ?",
+                              (path,)).fetchone()
+        if row and row["size"] == size and row["mtime"] == mtime:
+            return False
+
+        flight, segments = summarise(path)
+        with self.db:
+            if row:
+                self._delete(row["id"])
+            duration = (flight["t1"] - flight["t0"]) if flight["samples"] else 0.0
+            flight_id = self.db.execute(
+                "INSERT INTO flights (path, size, mtime, ingested, samples, duration_s, "
+                "min_lat, max_lat, min_lon, max_lon, max_alt, max_grc, max_arc) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, size, mtime, time.time(), flight["samples"], duration,
+                 flight["min_lat"], flight["max_lat"], flight["min_lon"], flight["max_lon"],
+                 flight["max_alt"], flight["max_grc"], flight["max_arc"])).lastrowid
+
+            first = self.db.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM segments").fetchone()[0]
+            self.db.executemany(
+                "INSERT INTO segments (id, flight_id, t_start, t_end, samples, arc, arc_label, "
+                "grc, zone, rule, min_alt, max_alt) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(first + i, flight_id, s["t0"], s["t1"], s["samples"], s["key"][0], s["label"],
+                  s["key"][1], zone_of(s["key"][2]), s["key"][2], s["min_alt"], s["max_alt"])
+                 for i, s in enumerate(segments)])
+            self.db.executemany(
+                "INSERT INTO segment_box VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(first + i, s["min_lon"], s["max_lon"], s["min_lat"], s["max_lat"],
+                  s["min_alt"], s["max_alt"]) for i, s in enumerate(segments)])
+        return True
+
+    def ingest_many(self, paths):
+        """Index every log in `paths`; returns (ingested, skipped)."""
+        ingested = skipped = 0
+        for path in paths:
+            if self.ingest(path):
+                ingested += 1
+            else:
+                skipped += 1
+        return ingested, skipped
+
+    # --- Queries ---
+    def _where(self, bbox, min_alt, max_alt, min_grc, arc, zone):
+        joins, where, args = [], [], []
+        # Altitude goes through the R*Tree with a bbox, else through the segment columns
+        table = "s"
+        if bbox is not None:
+            table = "b"
+            joins.append("JOIN segment_box b ON b.id = s.id")
+            west, south, east, north = bbox
+            where.append("b.max_lon >= ? AND b.min_lon <= ? AND b.max_lat >= ? AND b.min_lat <= ?")
+            args += [west, east, south, north]
+        if min_alt is not None:
+            where.append(f"{table}.max_alt >= ?")
+            args.append(min_alt)
+        if max_alt is not None:
+            where.append(f"{table}.min_alt <= ?")
+            args.append(max_alt)
+        if min_grc is not None:
+            where.append("s.grc >= ?")
+            args.append(min_grc)
+        if arc is not None:
+            where.append("s.arc = ?")
+            args.append(ARC_LEVELS.get(arc, arc))
+        if zone is not None:
+            where.append("s.zone = ?")
+            args.append(zone)
+        sql = " ".join(joins)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return sql, args
+
+    def segments(self, bbox=None, min_alt=None, max_alt=None, min_grc=None, arc=None,
+                 zone=None, limit=None):
+        """
+        Segments matching every given filter, with their flight's path.
+        bbox: (west, south, east, north) overlapping the segment box;
+        min_alt/max_alt: segment reaches above/below (m); arc: level or label.
+        """
+        where, args = self._where(bbox, min_alt, max_alt, min_grc, arc, zone)
+        sql = f"SELECT s.*, f.path FROM segments s JOIN flights f ON f.id = s.flight_id {where} " \
+              "ORDER BY f.path, s.t_start"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return self.db.execute(sql, args).fetchall()
+
+    def flights(self, bbox=None, min_alt=None, max_alt=None, min_grc=None, arc=None, zone=None):
+        """Flights with at least one matching segment, with the count and time of those."""
+        where, args = self._where(bbox, min_alt, max_alt, min_grc, arc, zone)
+        return self.db.execute(
+            "SELECT f.path, COUNT(*) AS segments, SUM(s.t_end - s.t_start) AS seconds, "
+            "MIN(s.t_start) AS first_t FROM segments s JOIN flights f ON f.id = s.flight_id "
+            f"{where} GROUP BY f.id ORDER BY f.path", args).fetchall()
+
+    def stats(self):
+        flights, samples = self.db.execute("SELECT COUNT(*), COALESCE(SUM(samples), 0) "
+                                           "FROM flights").fetchone()
+        segments = self.db.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+        return {"flights": flights, "samples": samples, "segments": segments}
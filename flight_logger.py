@@ -0,0 +1,276 @@
+import csv
+import gzip
+import json
+import os
+import threading
+import time
+
+LOG_HEADER = ["t_sec", "lat", "lon", "alt_m", "hdg_deg",
+              "spd_mps", "grc", "arc_label", "arc", "arc_rule"]
+
+# ARC level per label, for logs written before the arc column existed
+ARC_LEVELS = {"ARC-a": 0, "ARC-b": 1, "ARC-c": 2, "ARC-d": 3}
+
+# Segment file suffix per compression
+COMPRESSION_SUFFIX = {None: ".csv", "gzip": ".csv.gz", "zstd": ".csv.zst"}
+
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+def open_log_file(path, mode):
+    """Open a plain, .gz or .zst CSV file in text mode ("r" or "w")."""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", compresslevel=6, newline="", encoding="utf-8")
+    if path.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstd flight logs need the 'zstandard' package "
+                              "(pip install zstandard).")
+        return zstandard.open(path, mode + "t", newline="", encoding="utf-8")
+    return open(path, mode, newline="", encoding="utf-8")
+
+
+def log_stem(path):
+    """flight_log_X.csv / .csv.gz / .manifest.json -> flight_log_X"""
+    for suffix in (MANIFEST_SUFFIX, ".csv.gz", ".csv.zst", ".csv"):
+        if path.endswith(suffix):
+            return path[:-len(suffix)]
+    return os.path.splitext(path)[0]
+
+
+def log_segments(path):
+    """
+    Files making up a flight log: the segments listed in a manifest, or the
+    file itself for a single CSV.
+    """
+    if not path.endswith(MANIFEST_SUFFIX):
+        return [path]
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    folder = os.path.dirname(path)
+    return [os.path.join(folder, s["file"]) for s in manifest["segments"]]
+
+
+def _read_segment(path):
+    with open_log_file(path, "r") as f:
+        reader = csv.DictReader(f)
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except EOFError:
+                # Compressed segment still open when the writer stopped:
+                # everything up to its last commit is readable
+                return
+            if None in row.values():
+                return
+            yield row
+
+
+def read_log(path):
+    """
+    Yield the rows of a flight log as dicts, for both the old 8-column
+    schema (no grc/arc) and the current 10-column one. Missing columns are
+    returned as None. `path` may be a plain or compressed CSV or a
+    segmented log's manifest; segments are decompressed one at a time as
+    the rows are consumed.
+    """
+    for segment in log_segments(path):
+        for row in _read_segment(segment):
+            yield {
+                "t_sec": float(row["t_sec"]),
+                "lat": float(row["lat"]),
+                "lon": float(row["lon"]),
+                "alt_m": float(row["alt_m"]),
+                "hdg_deg": float(row["hdg_deg"]),
+                "spd_mps": float(row["spd_mps"]),
+                "grc": int(row["grc"]) if row.get("grc") not in (None, "") else None,
+                "arc_label": row.get("arc_label"),
+                "arc": int(row["arc"]) if row.get("arc") not in (None, "") else None,
+                "arc_rule": row.get("arc_rule"),
+            }
+
+
+class FlightLogWriter:
+    """
+    Group-commit CSV writer for flight logs.
+
+    write() only appends the row to an in-memory batch; a background thread
+    formats and writes the batch and flushes it to the OS every
+    `commit_interval_ms`, or as soon as `commit_rows` rows are pending. A
+    crash of the process therefore loses at most the rows of the last
+    commit_interval_ms (plus the duration of one commit). With fsync=True
+    each commit is also forced to disk, which extends the guarantee to
+    power loss at the cost of one fsync per commit.
+
+    With compress ("gzip" or "zstd"), rotate_bytes or rotate_seconds the log
+    is written as segments <stem>.0001.csv[.gz|.zst], ... each with its own
+    header, and listed in <stem>.manifest.json; `path` then points at the
+    manifest. A segment is rotated after the commit that makes it exceed
+    rotate_bytes (on disk, i.e. compressed) or rotate_seconds of age.
+    Compressed segments are sync-flushed on every commit, so even the
+    segment open during a crash is readable up to its last commit.
+    """
+
+    def __init__(self, path, header, commit_interval_ms=200, commit_rows=500, fsync=False,
+                 compress=None, rotate_bytes=None, rotate_seconds=None):
+        if commit_interval_ms <= 0 or commit_rows < 1:
+            raise ValueError("commit_interval_ms and commit_rows must be positive.")
+        if compress not in COMPRESSION_SUFFIX:
+            raise ValueError(f"unknown compression '{compress}' (use gzip or zstd).")
+        if (rotate_bytes is not None and rotate_bytes <= 0) or \
+                (rotate_seconds is not None and rotate_seconds <= 0):
+            raise ValueError("rotate_bytes and rotate_seconds must be positive.")
+        self.path = path
+        self.header = header
+        self.commit_interval = commit_interval_ms / 1000.0
+        self.commit_rows = commit_rows
+        self.fsync = fsync
+        self.compress = compress
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+
+        self.segmented = bool(compress or rotate_bytes or rotate_seconds)
+        self._stem = log_stem(path)
+        self.segments = []
+        self._file = None
+        if self.segmented:
+            self.path = self._stem + MANIFEST_SUFFIX
+        self._open_segment()
+
+        self._pending = []
+        self._cv = threading.Condition()
+        self._closed = False
+        self.error = None
+
+        # Counters
+        self.rows = 0
+        self.commits = 0
+        self.max_batch = 0
+        self.commit_time = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="flight-log", daemon=True)
+        self._thread.start()
+
+    # --- Segments ---
+    def _segment_path(self):
+        if not self.segmented:
+            return self.path
+        return f"{self._stem}.{len(self.segments) + 1:04d}{COMPRESSION_SUFFIX[self.compress]}"
+
+    def _open_segment(self):
+        path = self._segment_path()
+        self._file = open_log_file(path, "w")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(self.header)
+        self._file.flush()
+        self._segment_opened = time.monotonic()
+        self.segments.append({"file": os.path.basename(path), "rows": 0, "bytes": 0,
+                              "t_first": None, "t_last": None, "closed": False})
+        self._write_manifest()
+
+    def _close_segment(self):
+        self._file.close()
+        self._file = None
+        segment = self.segments[-1]
+        segment["bytes"] = os.path.getsize(self._current_path())
+        segment["closed"] = True
+        self._write_manifest()
+
+    def _current_path(self):
+        return os.path.join(os.path.dirname(self.path), self.segments[-1]["file"])
+
+    def _write_manifest(self):
+        if not self.segmented:
+            return
+        manifest = {"header": self.header, "compression": self.compress,
+                    "segments": self.segments}
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp, self.path)
+
+    def _should_rotate(self, size):
+        if self.rotate_bytes and size >= self.rotate_bytes:
+            return True
+        return bool(self.rotate_seconds
+                    and time.monotonic() - self._segment_opened >= self.rotate_seconds)
+
+    # --- Writing ---
+    def write(self, row):
+        with self._cv:
+            if self._closed:
+                raise ValueError("write to a closed flight log.")
+            self._pending.append(row)
+            if len(self._pending) >= self.commit_rows:
+                self._cv.notify()
+
+    def _commit(self, batch):
+        start = time.perf_counter()
+        self._writer.writerows(batch)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+        segment = self.segments[-1]
+        segment["rows"] += len(batch)
+        if segment["t_first"] is None:
+            segment["t_first"] = batch[0][0]
+        segment["t_last"] = batch[-1][0]
+        if self.segmented:
+            segment["bytes"] = os.path.getsize(self._current_path())
+            if self._should_rotate(segment["bytes"]):
+                self._close_segment()
+                self._open_segment()
+
+        self.commit_time += time.perf_counter() - start
+        self.rows += len(batch)
+        self.commits += 1
+        self.max_batch = max(self.max_batch, len(batch))
+
+    def _run(self):
+        while True:
+            with self._cv:
+                if not self._closed and len(self._pending) < self.commit_rows:
+                    self._cv.wait(self.commit_interval)
+                batch, self._pending = self._pending, []
+                closed = self._closed
+            if batch:
+                try:
+                    self._commit(batch)
+                except Exception as e:
+                    # Keep the first error for close(); later rows are dropped
+                    if self.error is None:
+                        self.error = e
+            if closed:
+                return
+
+    def close(self):
+        """Commit everything still pending and close the file."""
+        with self._cv:
+            if self._closed:
+                return
+            self._closed = True
+            self._cv.notify()
+        self._thread.join()
+        if self._file is not None:
+            self._close_segment()
+        if self.error is not None:
+            raise self.error
+
+    def stats(self):
+        return {
+            "rows": self.rows,
+            "commits": self.commits,
+            "max_batch": self.max_batch,
+            "commit_time_s": self.commit_time,
+            "segments": len(self.segments),
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
@@ -0,0 +1,269 @@
+import math
+import mmap
+import os
+import struct
+import time
+
+# ---------- File format ----------
+# Header: magic, frame size, reserved.
+# Frame:  t (s), POSI (lat, lon, alt as double; pitch, roll, hdg, gear as float),
+#         CTRL (elev, ail, rud, thr, gear, flaps, speedbrake as float, NaN if not recorded)
+MAGIC = b"P2MIREC1"
+HEADER = struct.Struct("<8sII")
+FRAME = struct.Struct("<d3d4f7f")
+
+POSI_FIELDS = 7
+CTRL_FIELDS = 7
+HDG_INDEX = 1 + 5  # heading inside a frame tuple (after t)
+
+NAN_CTRL = (float("nan"),) * CTRL_FIELDS
+
+
+class TrajectoryRecorder:
+    """
+    Writes fixed-width binary frames through a preallocated buffer, which is
+    written out every `buffer_frames` frames and on close().
+    """
+
+    def __init__(self, path, buffer_frames=1024):
+        self.path = path
+        self._file = open(path, "wb")
+        self._file.write(HEADER.pack(MAGIC, FRAME.size, 0))
+        self._buffer = bytearray(FRAME.size * buffer_frames)
+        self._capacity = buffer_frames
+        self._count = 0
+        self.frames = 0
+
+    def write(self, t, posi, ctrl=NAN_CTRL):
+        if len(posi) != POSI_FIELDS or len(ctrl) != CTRL_FIELDS:
+            raise ValueError("posi and ctrl must have 7 values each.")
+        FRAME.pack_into(self._buffer, self._count * FRAME.size, t, *posi, *ctrl)
+        self._count += 1
+        self.frames += 1
+        if self._count == self._capacity:
+            self.flush()
+
+    def flush(self):
+        if self._count:
+            self._file.write(memoryview(self._buffer)[:self._count * FRAME.size])
+            self._count = 0
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+
+class TrajectoryReader:
+    """
+    Memory-mapped read access to a recording. Frames are unpacked on demand.
+    """
+
+    def __init__(self, path):
+        self._map = None
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < HEADER.size:
+            self.close()
+            raise ValueError(f"'{path}' is not a trajectory recording.")
+
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, frame_size, _ = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or frame_size != FRAME.size:
+            self.close()
+            raise ValueError(f"'{path}' is not a trajectory recording.")
+        # A crash can leave a partial frame at the end: ignore it
+        self.count = (size - HEADER.size) // FRAME.size
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.count
+        if i < 0 or i >= self.count:
+            raise IndexError("frame index out of range")
+        return FRAME.unpack_from(self._map, HEADER.size + i * FRAME.size)
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self[i]
+
+    def time(self, i):
+        return struct.unpack_from("<d", self._map, HEADER.size + i * FRAME.size)[0]
+
+    def find(self, t, lo=0):
+        """Index of the last frame with timestamp <= t (binary search from lo)."""
+        hi = self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.time(mid) <= t:
+                lo = mid + 1
+            else:
+                hi = mid
+        return max(0, lo - 1)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+
+def interpolate(a, b, f):
+    """Linear interpolation between two frames, heading taken the short way round."""
+    out = [x + (y - x) * f for x, y in zip(a, b)]
+    dh = (b[HDG_INDEX] - a[HDG_INDEX] + 180.0) % 360.0 - 180.0
+    out[HDG_INDEX] = (a[HDG_INDEX] + dh * f) % 360.0
+    # Gear is discrete
+    out[1 + 6] = a[1 + 6]
+    out[1 + POSI_FIELDS + 4] = a[1 + POSI_FIELDS + 4]
+    return tuple(out)
+
+
+# ---------- Record / play ----------
+
+def _sleep_until(deadline):
+    delay = deadline - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
+
+
+def record(client, path, rate_hz=50.0, duration=60.0, with_ctrl=True):
+    """
+    Record ownship POSI (+ CTRL) at rate_hz on an absolute schedule, so the
+    achieved rate does not drift below the requested one. Ticks that are
+    missed entirely are skipped. Returns the number of frames written.
+    """
+    period = 1.0 / rate_hz
+    count = int(duration * rate_hz)
+    if count < 1:
+        raise ValueError("duration is less than a single frame.")
+
+    with TrajectoryRecorder(path) as recorder:
+        start = time.monotonic()
+        tick = 0
+        while tick < count:
+            _sleep_until(start + tick * period)
+            now = time.monotonic()
+            try:
+                posi = client.getPOSI()
+                ctrl = client.getCTRL() if with_ctrl else NAN_CTRL
+            except Exception as e:
+                print(f"Error reading position: {e}")
+            else:
+                recorder.write(now - start, posi, ctrl)
+
+            tick = max(tick + 1, int((time.monotonic() - start) / period) + 1)
+        return recorder.frames
+
+
+def play(client, path, rate_hz=None, time_scale=1.0, interpolated=False,
+         send_ctrl=False, loop=False):
+    """
+    Replay a recording with sendPOSI (and sendCTRL) on an absolute-deadline
+    schedule.
+
+    rate_hz=None sends every recorded frame at its own (scaled) timestamp.
+    Otherwise frames are sent at rate_hz; each output tick takes the recorded
+    frame at that point in time, or the interpolation of its neighbours when
+    `interpolated` is set. time_scale > 1 plays faster than real time.
+    """
+    if time_scale <= 0:
+        raise ValueError("time_scale must be positive.")
+
+    with TrajectoryReader(path) as reader:
+        if len(reader) == 0:
+            return 0
+        t_first = reader.time(0)
+        span = reader.time(len(reader) - 1) - t_first
+        sent = 0
+
+        while True:
+            start = time.monotonic()
+            if rate_hz is None:
+                for frame in reader:
+                    _sleep_until(start + (frame[0] - t_first) / time_scale)
+                    _send_frame(client, frame, send_ctrl)
+                    sent += 1
+            else:
+                period = 1.0 / rate_hz
+                tick = 0
+                index = 0
+                while True:
+                    t_rec = t_first + tick * period * time_scale
+                    if t_rec > t_first + span:
+                        break
+                    index = reader.find(t_rec, index)
+                    frame = reader[index]
+                    if interpolated and index + 1 < len(reader):
+                        nxt = reader[index + 1]
+                        dt = nxt[0] - frame[0]
+                        if dt > 0:
+                            frame = interpolate(frame, nxt, (t_rec - frame[0]) / dt)
+
+                    _sleep_until(start + tick * period)
+                    _send_frame(client, frame, send_ctrl)
+                    sent += 1
+                    tick = max(tick + 1, int((time.monotonic() - start) / period))
+
+            if not loop:
+                return sent
+
+
+def _send_frame(client, frame, send_ctrl):
+    try:
+        client.sendPOSI(frame[1:1 + POSI_FIELDS])
+        ctrl = frame[1 + POSI_FIELDS:]
+        if send_ctrl and not any(math.isnan(v) for v in ctrl):
+            client.sendCTRL(ctrl)
+    except Exception as e:
+        print(f"Error sending position: {e}")
+
+
+# ========================================================================
+# python flight_recorder.py record flight.rec --rate 50 --duration 120
+# python flight_recorder.py play flight.rec --rate 50 --scale 2 --interpolate
+if __name__ == "__main__":
+    import argparse
+    import xpc
+
+    parser = argparse.ArgumentParser(description="Binary trajectory recorder/player")
+    parser.add_argument("action", choices=["record", "play"])
+    parser.add_argument("path")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=49009)
+    parser.add_argument("--rate", type=float, help="frames per second")
+    parser.add_argument("--duration", type=float, default=60.0, help="recording length (s)")
+    parser.add_argument("--scale", type=float, default=1.0, help="playback time scale")
+    parser.add_argument("--interpolate", action="store_true")
+    parser.add_argument("--ctrl", action="store_true", help="also replay control surfaces")
+    parser.add_argument("--loop", action="store_true")
+    args = parser.parse_args()
+
+    with xpc.XPlaneConnect(args.host, args.port, 0, 1000) as client:
+        if args.action == "record":
+            print("Recording...")
+            frames = record(client, args.path, args.rate or 50.0, args.duration)
+            print(f"Recording Complete ({frames} frames)")
+        else:
+            print("Starting Playback...")
+            frames = play(client, args.path, args.rate, args.scale, args.interpolate,
+                          args.ctrl, args.loop)
+            print(f"Playback Complete ({frames} frames)")
@@ -1,6 +1,4 @@
-import rasterio
-import numpy as np
-from pyproj import Transformer
+import threading
 
 GEOTIFF_FILE_PATH ='GRC_IDN_Compresssed.tif'
 
@@ -12,6 +10,10 @@ class _GRC_Engine:
     """
 
     def __init__(self, geotiff_path):
+        # Heavy imports are deferred until the engine is actually needed
+        import rasterio
+        from pyproj import Transformer
+
         self.grc_map_array = None
         self.transform = None
         self.crs = None
@@ -87,14 +89,68 @@ class _GRC_Engine:
             print(f"ERROR saat membaca GRC untuk ({lat}, {lon}): {e}")
             return None
 
+    def get_grc_many(self, lat, lon):
+        """
+        Vectorized get_grc for arrays of lat/lon: one pyproj call and one
+        raster gather. Returns an int8 array of Final GRC, -1 where the
+        position is out of bound or the iGRC has no mapping.
+        """
+        import numpy as np
+
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        out = np.full(lat.shape, -1, dtype=np.int8)
+        if self.grc_map_array is None:
+            print("Error: Raster GRC didn't load.")
+            return out
+
+        x, y = self.transformer.transform(lon, lat)
+        inverse = ~self.transform
+        col = inverse.a * x + inverse.b * y + inverse.c
+        row = inverse.d * x + inverse.e * y + inverse.f
+        # int() in get_grc truncates towards zero; NaN positions are out of bound
+        valid = np.isfinite(row) & np.isfinite(col)
+        row = np.trunc(np.where(valid, row, -1)).astype(np.int64)
+        col = np.trunc(np.where(valid, col, -1)).astype(np.int64)
+        height, width = self.grc_map_array.shape
+        inside = valid & (row >= 0) & (col >= 0) & (row < height) & (col < width)
+
+        lookup = np.full(256, -1, dtype=np.int8)
+        for igrc in range(256):
+            final = self._map_to_final_grc(igrc)
+            if final is not None:
+                lookup[igrc] = final
+        igrc = self.grc_map_array[row[inside], col[inside]].astype(np.int64)
+        known = (igrc >= 0) & (igrc < 256)
+        values = np.full(igrc.shape, -1, dtype=np.int8)
+        values[known] = lookup[igrc[known]]
+        out[inside] = values
+        return out
+
 
 # ========================================================================
-# Inisialisasi mesin GRC
-grc_engine = _GRC_Engine(GEOTIFF_FILE_PATH)
+# Inisialisasi mesin GRC (lazy: raster is loaded on first use)
+grc_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    global grc_engine
+    if grc_engine is None:
+        with _engine_lock:
+            if grc_engine is None:
+                grc_engine = _GRC_Engine(GEOTIFF_FILE_PATH)
+    return grc_engine
 
 
 # ========================================================================
 # Fungsi wrapper agar lebih mudah dipanggil
 def final_grc(lat, lon):
-    if grc_engine:
-        return grc_engine.get_grc(lat, lon)
+    engine = get_engine()
+    if engine:
+        return engine.get_grc(lat, lon)
+
+
+def final_grc_many(lat, lon):
+    """final_grc for arrays of lat/lon; -1 where final_grc returns None."""
+    return get_engine().get_grc_many(lat, lon)
@@ -0,0 +1,242 @@
+"""
+Lightweight per-stage latency instrumentation.
+
+Enable with the environment variable P2MI_PROFILE=1 (or enable() before the
+hooks are installed). P2MI_PROFILE_INTERVAL sets the period of the summary
+dumps in seconds (default 30, 0 = only on exit).
+
+When disabled, timed() and instrument() return the original callables and
+span() returns a shared no-op context, so the hooks cost nothing on the
+hot path.
+"""
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+
+ENABLED = bool(os.environ.get("P2MI_PROFILE"))
+DUMP_INTERVAL_S = float(os.environ.get("P2MI_PROFILE_INTERVAL", "30"))
+
+# Log-linear buckets: 32 sub-buckets per power of two (~3 % relative error)
+SUB_BUCKET_BITS = 5
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+
+def _bucket_index(value):
+    bits = value.bit_length()
+    if bits <= SUB_BUCKET_BITS + 1:
+        return value
+    shift = bits - SUB_BUCKET_BITS - 1
+    return (shift + 1) * SUB_BUCKETS + (value >> shift) - SUB_BUCKETS
+
+
+def _bucket_value(index):
+    """Upper bound of the values counted in a bucket."""
+    if index < 2 * SUB_BUCKETS:
+        return index
+    shift = index // SUB_BUCKETS - 1
+    top = index % SUB_BUCKETS + SUB_BUCKETS
+    return ((top + 1) << shift) - 1
+
+
+class HdrHistogram:
+    """
+    HDR-style histogram of non-negative integers (nanoseconds here) with
+    constant relative precision and sparse bucket storage.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self._lock = threading.Lock()
+
+    def record(self, value):
+        index = _bucket_index(value)
+        with self._lock:
+            self.counts[index] = self.counts.get(index, 0) + 1
+            self.count += 1
+            self.total += value
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+
+    def percentile(self, q):
+        with self._lock:
+            if not self.count:
+                return 0
+            target = q * self.count
+            seen = 0
+            for index in sorted(self.counts):
+                seen += self.counts[index]
+                if seen >= target:
+                    return min(_bucket_value(index), self.max)
+            return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self):
+        ms = 1e-6
+        return {
+            "count": self.count,
+            "mean_ms": self.mean() * ms,
+            "p50_ms": self.percentile(0.50) * ms,
+            "p90_ms": self.percentile(0.90) * ms,
+            "p99_ms": self.percentile(0.99) * ms,
+            "max_ms": (self.max or 0) * ms,
+            "total_s": self.total * 1e-9,
+        }
+
+
+# ---------- Registry ----------
+
+_histograms = {}
+_registry_lock = threading.Lock()
+
+
+def histogram(name):
+    h = _histograms.get(name)
+    if h is None:
+        with _registry_lock:
+            h = _histograms.setdefault(name, HdrHistogram())
+    return h
+
+
+def record(name, elapsed_ns):
+    histogram(name).record(elapsed_ns)
+
+
+def timed(name):
+    """Decorator timing every call under `name` (identity when disabled)."""
+    def decorator(fn):
+        if not ENABLED:
+            return fn
+        h = histogram(name)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                h.record(time.perf_counter_ns() - start)
+        return wrapper
+    return decorator
+
+
+def instrument(obj, names, prefix=""):
+    """Replace obj.<name> for every name with a timed wrapper (no-op when disabled)."""
+    if not ENABLED:
+        return
+    for name in names:
+        fn = getattr(obj, name, None)
+        if fn is None or getattr(fn, "_p2mi_timed", False):
+            continue
+        wrapper = timed(prefix + name)(fn)
+        wrapper._p2mi_timed = True
+        try:
+            setattr(obj, name, wrapper)
+        except (AttributeError, TypeError):
+            # e.g. read-only attributes of extension types
+            pass
+
+
+class _Span:
+    __slots__ = ("h", "start")
+
+    def __init__(self, h):
+        self.h = h
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.h.record(time.perf_counter_ns() - self.start)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name):
+    """Context manager timing a block of code under `name`."""
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(histogram(name))
+
+
+# ---------- Reporting ----------
+
+def summaries():
+    return {name: h.summary() for name, h in sorted(_histograms.items())}
+
+
+def format_summary():
+    lines = [f"{'timer':<32} {'count':>8} {'mean ms':>9} {'p50 ms':>9} "
+             f"{'p99 ms':>9} {'max ms':>9} {'total s':>9}"]
+    for name, s in summaries().items():
+        if not s["count"]:
+            continue
+        lines.append(f"{name:<32} {s['count']:>8d} {s['mean_ms']:>9.3f} {s['p50_ms']:>9.3f} "
+                     f"{s['p99_ms']:>9.3f} {s['max_ms']:>9.3f} {s['total_s']:>9.3f}")
+    return "\n".join(lines)
+
+
+def dump(path=None):
+    """Print the summary table, and write it as JSON to `path` if given."""
+    if not _histograms:
+        return
+    print("\n" + format_summary(), flush=True)
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(summaries(), f, indent=2)
+
+
+_dumper = None
+
+
+def start(path=None, interval_s=DUMP_INTERVAL_S):
+    """Dump summaries every interval_s seconds and once more at exit."""
+    global _dumper
+    if not ENABLED or _dumper is not None:
+        return
+
+    stop = threading.Event()
+
+    def loop():
+        while not stop.wait(interval_s):
+            dump(path)
+
+    if interval_s > 0:
+        _dumper = threading.Thread(target=loop, name="profile-dump", daemon=True)
+        _dumper.start()
+    else:
+        _dumper = True
+
+    def at_exit():
+        stop.set()
+        dump(path)
+
+    atexit.register(at_exit)
+
+
+def enable():
+    """Turn instrumentation on. Only affects hooks installed afterwards."""
+    global ENABLED
+    ENABLED = True
@@ -0,0 +1,171 @@
+"""
+Export a flight log as a time-stamped, risk-coloured KML.
+
+    python kml_export.py logs/flight_log_20251121_134215.csv [--out track.kml]
+
+The document holds a gx:Track with one <when> per sample (for the Google
+Earth time slider) and two folders of LineString segments, split wherever
+the ARC level or the GRC changes and coloured like the dashboard. The log
+is read once; the parts of the document are streamed into temporary files
+and concatenated, so memory does not grow with the length of the flight.
+"""
+import os
+import re
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone
+from xml.sax.saxutils import escape
+
+from flight_logger import ARC_LEVELS, log_stem, read_log
+
+# KML colours (aabbggrr) for the dashboard's risk_color() levels
+RISK_STYLES = {
+    "risk_green": "ff00ff00",
+    "risk_yellow": "ff00ffff",
+    "risk_orange": "ff00a5ff",
+    "risk_red": "ff0000ff",
+    "risk_unknown": "ff888888",
+}
+
+
+def risk_style(level):
+    """Style id for a risk level, same thresholds as plotting.risk_color."""
+    if level is None:
+        return "risk_unknown"
+    if level <= 1:
+        return "risk_green"
+    elif level == 2:
+        return "risk_yellow"
+    elif level == 3:
+        return "risk_orange"
+    return "risk_red"
+
+
+def log_start_time(path):
+    """Start of the log from its flight_log_YYYYmmdd_HHMMSS name, else the file time."""
+    match = re.search(r"(\d{8}_\d{6})", os.path.basename(path))
+    if match:
+        return datetime.strptime(match.group(1), "%Y%m%d_%H%M%S").astimezone(timezone.utc)
+    return datetime.fromtimestamp(os.path.getmtime(path), timezone.utc)
+
+
+class _Segments:
+    """
+    Streams LineString placemarks, starting a new one whenever the key
+    changes. A placemark is only written once it has two coordinates, so a
+    key that changes on the last sample (or a one-sample log) leaves no
+    invalid one-point LineString.
+    """
+
+    def __init__(self, title, label):
+        self.file = tempfile.TemporaryFile("w+", encoding="utf-8")
+        self.title = title
+        self.label = label
+        self.key = object()
+        self.count = 0
+        self.points = 0      # coordinates in the current segment
+        self._start = None   # header and first coordinate, held until the second
+
+    def add(self, key, t_sec, coord):
+        if key != self.key:
+            if self.points:
+                # Close the previous segment at this point so the line is continuous
+                self._point(coord)
+                self._close()
+            self.key = key
+            self._start = (f"<Placemark><name>{escape(self.label(key))} from t={t_sec:.1f} s</name>"
+                           f"<styleUrl>#{risk_style(key[0])}</styleUrl>\n"
+                           f"<LineString><altitudeMode>absolute</altitudeMode><coordinates>\n")
+        self._point(coord)
+
+    def _point(self, coord):
+        self.points += 1
+        if self.points == 1:
+            self._start += coord + "\n"
+            return
+        if self.points == 2:
+            self.file.write(self._start)
+            self.count += 1
+        self.file.write(coord + "\n")
+
+    def _close(self):
+        if self.points >= 2:
+            self.file.write("</coordinates></LineString></Placemark>\n")
+        self.points = 0
+        self._start = None
+
+    def copy_to(self, out):
+        self._close()
+        out.write(f"<Folder><name>{self.title}</name>\n")
+        self.file.seek(0)
+        shutil.copyfileobj(self.file, out)
+        out.write("</Folder>\n")
+        self.file.close()
+
+
+def export_kml(log_path, out_path=None, start=None, name=None):
+    """
+    Write log_path (CSV, compressed CSV or segment manifest) as KML.
+    start: datetime of t_sec = 0 (default: from the log name).
+    Returns (out_path, samples).
+    """
+    if out_path is None:
+        out_path = log_stem(log_path) + ".kml"
+    if start is None:
+        start = log_start_time(log_path)
+    name = name or os.path.basename(log_stem(log_path))
+
+    coords = tempfile.TemporaryFile("w+", encoding="utf-8")
+    arc_segments = _Segments("ARC", lambda key: key[1] or "ARC unknown")
+    grc_segments = _Segments("GRC", lambda key: f"GRC {key[0]}" if key[0] is not None else "GRC unknown")
+
+    samples = 0
+    with open(out_path, "w", encoding="utf-8") as out:
+        out.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                  '<kml xmlns="http://www.opengis.net/kml/2.2" '
+                  'xmlns:gx="http://www.google.com/kml/ext/2.2">\n<Document>\n'
+                  f"<name>{escape(name)}</name>\n")
+        for style, color in RISK_STYLES.items():
+            out.write(f'<Style id="{style}"><LineStyle><color>{color}</color>'
+                      f"<width>4</width></LineStyle></Style>\n")
+        out.write('<Style id="track"><IconStyle><Icon><href>'
+                  "http://maps.google.com/mapfiles/kml/shapes/airports.png"
+                  "</href></Icon></IconStyle>"
+                  "<LineStyle><color>ffffff00</color><width>2</width></LineStyle></Style>\n"
+                  "<Placemark><name>Flight Track</name><styleUrl>#track</styleUrl>\n"
+                  "<gx:Track><altitudeMode>absolute</altitudeMode>\n")
+
+        # One pass: <when> goes straight to the output, everything else is spooled
+        for r in read_log(log_path):
+            when = start + timedelta(seconds=r["t_sec"])
+            out.write(f"<when>{when.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3]}Z</when>\n")
+            coords.write(f"<gx:coord>{r['lon']:.7f} {r['lat']:.7f} {r['alt_m']:.1f}</gx:coord>\n")
+            coord = f"{r['lon']:.7f},{r['lat']:.7f},{r['alt_m']:.1f}"
+            arc = r["arc"] if r["arc"] is not None else ARC_LEVELS.get(r["arc_label"])
+            arc_segments.add((arc, r["arc_label"]), r["t_sec"], coord)
+            grc_segments.add((r["grc"],), r["t_sec"], coord)
+            samples += 1
+
+        coords.seek(0)
+        shutil.copyfileobj(coords, out)
+        coords.close()
+        out.write("</gx:Track></Placemark>\n")
+        arc_segments.copy_to(out)
+        grc_segments.copy_to(out)
+        out.write("</Document>\n</kml>\n")
+    return out_path, samples
+
+
+# ========================================================================
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Export a flight log as risk-coloured KML")
+    parser.add_argument("log", help="flight_log_*.csv or .manifest.json")
+    parser.add_argument("--out", help="output .kml (default: next to the log)")
+    args = parser.parse_args()
+
+    t = time.perf_counter()
+    path, samples = export_kml(args.log, args.out)
+    print(f"{path}: {samples} samples in {time.perf_counter() - t:.2f} s")
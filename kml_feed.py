@@ -0,0 +1,217 @@
+"""
+Live Google Earth feed of the flight, served over local HTTP.
+
+    feed = KMLFeed(port=8008)
+    feed.start()
+    feed.add(t_sec, lat, lon, alt, grc, arc, arc_label, rule)   # per sample
+
+Open http://127.0.0.1:8008/feed.kml in Google Earth. It loads /track.kml
+once (the recent track from the in-memory ring plus ARC/GRC state
+placemarks), which carries a NetworkLink polling /update.kml. Every poll
+returns a NetworkLinkControl whose <cookie> is the last sample sent, and an
+<Update> that only creates segments for the samples added since then and
+moves the state placemarks, so a poll costs the same however long the
+flight is.
+"""
+import itertools
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+from kml_export import RISK_STYLES, risk_style
+
+KML_TYPE = "application/vnd.google-earth.kml+xml"
+
+KML_OPEN = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<kml xmlns="http://www.opengis.net/kml/2.2">\n')
+
+
+def _styles():
+    parts = []
+    for style, color in RISK_STYLES.items():
+        parts.append(f'<Style id="{style}"><LineStyle><color>{color}</color>'
+                     f"<width>4</width></LineStyle></Style>\n")
+        parts.append(f'<Style id="icon_{style}"><IconStyle><color>{color}</color><Icon><href>'
+                     "http://maps.google.com/mapfiles/kml/shapes/airports.png"
+                     "</href></Icon></IconStyle></Style>\n")
+    return "".join(parts)
+
+
+STYLES = _styles()
+
+
+def _coords(samples):
+    return " ".join(f"{lon:.7f},{lat:.7f},{alt:.1f}" for _, _, lat, lon, alt, _, _ in samples)
+
+
+class KMLFeed:
+    """
+    Ring buffer of the last `capacity` samples plus the HTTP server serving
+    them. add() is cheap and never blocks on clients.
+    """
+
+    def __init__(self, host="127.0.0.1", port=8008, capacity=10000, refresh_s=1.0):
+        self.host = host
+        self.port = port
+        self.refresh_s = refresh_s
+
+        # (seq, t_sec, lat, lon, alt, arc, grc)
+        self._ring = deque(maxlen=capacity)
+        self._seq = 0
+        self._state = None   # (lat, lon, alt, grc, arc, arc_label, rule)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+        # Counters
+        self.polls = 0
+
+    def add(self, t_sec, lat, lon, alt, grc, arc, arc_label, rule):
+        with self._lock:
+            self._seq += 1
+            self._ring.append((self._seq, t_sec, lat, lon, alt, arc, grc))
+            self._state = (lat, lon, alt, grc, arc, arc_label, rule)
+
+    def _since(self, seq):
+        """Samples newer than seq (at most the whole ring), the sample at seq and the state."""
+        with self._lock:
+            count = max(0, min(len(self._ring), self._seq - seq))
+            # Walk from the newest end so the cost depends on the new samples only
+            new = list(itertools.islice(reversed(self._ring), count + 1))
+            return self._seq, new[::-1], self._state
+
+    # --- Documents ---
+    @staticmethod
+    def _state_items(state):
+        lat, lon, alt, grc, arc, arc_label, rule = state
+        coordinates = f"{lon:.7f},{lat:.7f},{alt:.1f}"
+        fields = f"<description>{escape(rule or '')}</description>"
+        return [("arc", f"<name>{escape(str(arc_label))}</name>{fields}"
+                        f"<styleUrl>#icon_{risk_style(arc)}</styleUrl>", coordinates),
+                ("grc", f"<name>GRC {grc}</name>{fields}"
+                        f"<styleUrl>#icon_{risk_style(grc)}</styleUrl>", coordinates)]
+
+    def _state_placemarks(self, state):
+        """ARC and GRC placemarks at the current position."""
+        if state is None:
+            return ""
+        return "".join(
+            f'<Placemark id="{key}_state">{fields}<Point id="{key}_point">'
+            f"<altitudeMode>absolute</altitudeMode><coordinates>{coordinates}</coordinates>"
+            f"</Point></Placemark>\n"
+            for key, fields, coordinates in self._state_items(state))
+
+    def _state_changes(self, state):
+        """Update/Change of the state placemarks; the Point is a target of its own."""
+        return "".join(
+            f'<Placemark targetId="{key}_state">{fields}</Placemark>'
+            f'<Point targetId="{key}_point"><coordinates>{coordinates}</coordinates></Point>'
+            for key, fields, coordinates in self._state_items(state))
+
+    @staticmethod
+    def _segments(samples):
+        """
+        LineString placemarks for samples[0..n], a new one wherever the ARC
+        changes, each styled by its own ARC. As in kml_export a segment runs
+        up to the first sample of the next, so the line is continuous.
+        """
+        parts = []
+        start = 0
+        for i in range(1, len(samples) + 1):
+            if i < len(samples) and samples[i][5] == samples[start][5]:
+                continue
+            run = samples[start:i + 1]
+            if len(run) > 1:
+                seq, arc = run[0][0], run[0][5]
+                parts.append(f'<Placemark id="seg_{seq}"><styleUrl>#{risk_style(arc)}</styleUrl>'
+                             f"<LineString><altitudeMode>absolute</altitudeMode>"
+                             f"<coordinates>{_coords(run)}</coordinates></LineString></Placemark>\n")
+            start = i
+        return "".join(parts)
+
+    def feed_kml(self, base):
+        return (f"{KML_OPEN}<NetworkLink><name>P2MI live flight</name>"
+                f"<Link><href>{base}/track.kml</href></Link></NetworkLink>\n</kml>\n")
+
+    def track_kml(self, base):
+        seq, samples, state = self._since(0)
+        track = self._segments(samples)
+        return (f"{KML_OPEN}<Document><name>P2MI live flight</name>\n{STYLES}"
+                f'<Folder id="track"><name>Track</name>\n{track}</Folder>\n'
+                f"{self._state_placemarks(state)}"
+                f"<NetworkLink><name>Updates</name><Link><href>{base}/update.kml?since={seq}</href>"
+                f"<refreshMode>onInterval</refreshMode><refreshInterval>{self.refresh_s}</refreshInterval>"
+                f"</Link></NetworkLink>\n</Document>\n</kml>\n")
+
+    def update_kml(self, base, since):
+        self.polls += 1
+        seq, samples, state = self._since(since)
+        updates = []
+        track = self._segments(samples)
+        if track:
+            updates.append(f'<Create><Folder targetId="track">{track}</Folder></Create>')
+        if state is not None and seq != since:
+            updates.append(f"<Change>{self._state_changes(state)}</Change>")
+        update = ""
+        if updates:
+            update = (f"<Update><targetHref>{base}/track.kml</targetHref>"
+                      f"{''.join(updates)}</Update>")
+        return (f"{KML_OPEN}<NetworkLinkControl><cookie>since={seq}</cookie>"
+                f"{update}</NetworkLinkControl>\n</kml>\n")
+
+    # --- Server ---
+    def start(self):
+        feed = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                base = f"http://{self.headers.get('Host') or f'{feed.host}:{feed.port}'}"
+                if url.path in ("/", "/feed.kml"):
+                    body = feed.feed_kml(base)
+                elif url.path == "/track.kml":
+                    body = feed.track_kml(base)
+                elif url.path == "/update.kml":
+                    # Google Earth appends the cookie, so the last "since" wins
+                    try:
+                        since = int(parse_qs(url.query).get("since", ["0"])[-1])
+                    except ValueError:
+                        self.send_error(400, "bad since")
+                        return
+                    body = feed.update_kml(base, since)
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", KML_TYPE)
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="kml-feed", daemon=True)
+        self._thread.start()
+        print(f"Google Earth feed: http://{self.host}:{self.port}/feed.kml")
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.stop()
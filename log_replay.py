@@ -0,0 +1,91 @@
+"""
+Replay of recorded telemetry through the monitoring pipeline, without
+X-Plane.
+
+    python p2mi.py monitor --replay logs/flight_log_20250101_120000.csv --speed 10 --quiet
+    python p2mi.py monitor --replay flight.rec --speed 0 --no-dashboard --quiet
+
+Reads flight_log_*.csv (plain, compressed or a segment manifest), columnar
+.p2mc logs and flight_recorder recordings, detected by their first bytes.
+Samples keep their recorded timestamps, so a replay classifies and logs
+exactly the same rows at any speed: speed=1 paces them in real time,
+speed=N N times faster and speed=0 as fast as the pipeline accepts them.
+"""
+import math
+import time
+
+import numpy as np
+
+import columnar_log
+import flight_recorder
+from reclassify import read_columns
+
+EARTH_RADIUS_M = 6371000.0
+
+
+def _ground_speed(t, lat, lon):
+    """m/s between consecutive positions, for recordings without a speed channel."""
+    if len(t) < 2:
+        return np.zeros(len(t))
+    dlat = np.radians(np.diff(lat))
+    dlon = np.radians(np.diff(lon)) * np.cos(np.radians(lat[:-1]))
+    dt = np.diff(t)
+    speed = np.hypot(dlat, dlon) * EARTH_RADIUS_M / np.where(dt > 0, dt, np.inf)
+    return np.append(speed, speed[-1])
+
+
+def load_samples(path):
+    """(t, lat, lon, alt, hdg, spd) arrays of a log or recording."""
+    with open(path, "rb") as f:
+        magic = f.read(8)
+    if magic == flight_recorder.MAGIC:
+        with flight_recorder.TrajectoryReader(path) as reader:
+            frames = np.array([frame[:7] for frame in reader], dtype=float).reshape(-1, 7)
+        t, lat, lon, alt, hdg = frames[:, 0], frames[:, 1], frames[:, 2], frames[:, 3], frames[:, 6]
+        return t, lat, lon, alt, hdg, _ground_speed(t, lat, lon)
+    if magic == columnar_log.MAGIC:
+        with columnar_log.ColumnarLog(path) as log:
+            return tuple(log.column(name).astype(float)
+                         for name in ("t_sec", "lat", "lon", "alt_m", "hdg_deg", "spd_mps"))
+    d = read_columns(path)
+    return d["t_sec"], d["lat"], d["lon"], d["alt_m"], d["hdg_deg"], d["spd_mps"]
+
+
+class LogReplay:
+    """
+    Recorded samples as a paced iterator of (t, lat, lon, alt, hdg, spd),
+    the tuples the monitor's acquisition stage produces.
+    """
+
+    def __init__(self, path, speed=1.0):
+        if speed is not None and speed < 0:
+            raise ValueError("speed must be positive, or 0 for as fast as possible.")
+        self.path = path
+        self.speed = speed or 0.0
+        columns = load_samples(path)
+        order = np.argsort(columns[0], kind="stable")
+        self._rows = list(zip(*(c[order].tolist() for c in columns)))
+        self.emitted = 0
+        self.started = None
+
+    def __len__(self):
+        return len(self._rows)
+
+    def describe(self):
+        return "as fast as possible" if not self.speed else f"{self.speed:g}x"
+
+    def __iter__(self):
+        rows = self._rows
+        self.started = time.perf_counter()
+        if not rows:
+            return
+        t_first = rows[0][0]
+        for row in rows:
+            if self.speed:
+                delay = self.started + (row[0] - t_first) / self.speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            if any(isinstance(v, float) and math.isnan(v) for v in row[1:4]):
+                continue  # no position, nothing to classify
+            self.emitted += 1
+            yield row
@@ -0,0 +1,295 @@
+import os
+import threading
+import time
+from datetime import datetime
+from queue import Empty
+
+import xpc
+import arc_classifier
+import grc_classifier
+import RealTimeKML
+import instrumentation as prof
+from flight_logger import FlightLogWriter, LOG_HEADER, log_stem
+from pipeline import Pipeline, CLOSED
+from risk_summary import RiskSummary, summary_path
+
+# Replays are logged apart from real flights, so the archive tools never take one for a flight
+LOG_DIR = "logs"
+REPLAY_LOG_DIR = "logs_replay"
+KML_DIR = "flight_path"
+REPLAY_KML_DIR = "flight_path_replay"
+
+POSITION_DREFS = [
+    "sim/flightmodel/position/latitude",
+    "sim/flightmodel/position/longitude",
+    "sim/flightmodel/position/elevation",
+    "sim/flightmodel/position/psi",
+    "sim/flightmodel/position/groundspeed",
+]
+
+
+def run(xpHost='192.168.10.2', xpPort=49009, rate_hz=2, log_dir=None,
+        kml_dir=KML_DIR, dashboard=True, timeout=100, retries=2, verbose=True,
+        commit_interval_ms=200, columnar=False, compress=None, rotate_mb=None,
+        rotate_minutes=None, kml_feed_port=None, web_port=None, replay=None, speed=1.0):
+    """
+    Monitor X-Plane: acquire position at rate_hz, classify GRC/ARC, log to
+    CSV and KML and (optionally) show the matplotlib dashboard.
+    kml_dir=None disables the KML track. The CSV is group-committed, so a
+    crash loses at most commit_interval_ms of rows. columnar=True also
+    writes a .p2mc columnar log next to it. compress ("gzip"/"zstd"),
+    rotate_mb and rotate_minutes write the CSV as rotated segments listed in
+    a manifest (see flight_logger.FlightLogWriter). kml_feed_port serves a
+    live Google Earth NetworkLink (see kml_feed), web_port a browser
+    dashboard that needs no display (see web_dashboard). The risk-exposure
+    summary is written next to the log on exit (see risk_summary).
+    replay takes the samples from a recorded log instead of X-Plane, at
+    `speed` times real time (0: as fast as possible, see log_replay); no
+    sample is dropped and the end-to-end rate is reported. A replay is
+    logged as replay_<source>_<time>.csv in REPLAY_LOG_DIR unless log_dir is
+    given, its track goes to REPLAY_KML_DIR unless kml_dir is changed from
+    KML_DIR, and its summary names the source log. Blocks until Ctrl+C, an
+    error or the end of the replay. Returns the path to read the
+    log back from.
+    """
+    period = 1 / rate_hz
+    if log_dir is None:
+        log_dir = REPLAY_LOG_DIR if replay else LOG_DIR
+    if replay and kml_dir == KML_DIR:
+        kml_dir = REPLAY_KML_DIR
+
+    # Create folders if not exists
+    os.makedirs(log_dir, exist_ok=True)
+    if kml_dir:
+        os.makedirs(kml_dir, exist_ok=True)
+
+    # matplotlib is only imported when the dashboard is wanted
+    plt = None
+    if dashboard:
+        import plotting as plt
+
+    client = None
+    source = None
+    if replay:
+        from log_replay import LogReplay
+        source = LogReplay(replay, speed)
+        print(f"Replaying {replay}: {len(source)} samples, {source.describe()}")
+    else:
+        client = xpc.XPlaneConnect(xpHost=xpHost, xpPort=xpPort, timeout=timeout,
+                                   retries=retries, adaptiveTimeout=True)
+        print("Connected to X-Plane")
+
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    name = f"flight_log_{timestamp}"
+    track_name = f"flight_path_{timestamp}"
+    if replay:
+        # log_stem() only knows the CSV suffixes; .rec and .p2mc lose their extension
+        stem = log_stem(replay)
+        if stem == replay:
+            stem = os.path.splitext(replay)[0]
+        name = track_name = f"replay_{os.path.basename(stem)}_{timestamp}"
+    filename = os.path.join(log_dir, f"{name}.csv")
+
+    flight_log = FlightLogWriter(
+        filename, LOG_HEADER, commit_interval_ms=commit_interval_ms, compress=compress,
+        rotate_bytes=int(rotate_mb * 1e6) if rotate_mb else None,
+        rotate_seconds=rotate_minutes * 60 if rotate_minutes else None)
+    columnar_log = None
+    if columnar:
+        from columnar_log import ColumnarLogWriter
+        columnar_log = ColumnarLogWriter(filename.replace(".csv", ".p2mc"))
+
+    print(f"Logging to {flight_log.path}")
+    summary = RiskSummary(source=os.path.abspath(replay) if replay else None)
+    kml = None
+    if kml_dir:
+        # Streamed and simplified while flying; valid on disk at all times
+        kml = RealTimeKML.StreamingKMLWriter(
+            os.path.join(kml_dir, f"{track_name}.kml"), name=f"Log {timestamp}")
+    feed = None
+    if kml_feed_port is not None:
+        from kml_feed import KMLFeed
+        feed = KMLFeed(port=kml_feed_port)
+        feed.start()
+    web = None
+    if web_port is not None:
+        from web_dashboard import WebDashboard
+        web = WebDashboard(port=web_port)
+        web.start()
+
+    # --- Profiling hooks (no-op unless profiling is enabled) ---
+    if prof.ENABLED:
+        engine = grc_classifier.get_engine()
+        if client:
+            prof.instrument(client, ["getDREF", "getDREFs", "getPOSI", "getPOSIs", "getCTRL"],
+                            prefix="xpc.")
+        prof.instrument(grc_classifier, ["final_grc"], prefix="grc.")
+        prof.instrument(engine, ["get_grc"], prefix="grc.")
+        prof.instrument(engine.transformer, ["transform"], prefix="grc.pyproj_")
+        prof.instrument(arc_classifier, ["air_risk", "parse_kml_polygons", "point_in_any"], prefix="arc.")
+        if plt:
+            prof.instrument(plt, ["render"], prefix="plot.")
+        prof.start(filename.replace(".csv", "_profile.json"))
+    elif source:
+        # Loaded up front so the replay rate measures the pipeline, not the raster read
+        grc_classifier.get_engine()
+    else:
+        # Load the GRC raster in the background; the classify stage waits for it
+        threading.Thread(target=grc_classifier.get_engine, daemon=True).start()
+
+    # --- Start time reference (t=0) ---
+    t0 = time.time()
+
+    # ===========================
+    # PIPELINE STAGES
+    # ===========================
+    def acquire():
+        """Fixed-rate acquisition thread: one GETD round trip per tick."""
+        lat, lon, alt, hdg, spd = (row[0] for row in client.getDREFs(POSITION_DREFS))
+
+        # --- Time starts from zero ---
+        t_now = time.time() - t0
+        return (t_now, lat, lon, alt, hdg, spd)
+
+    def classify(sample):
+        t_now, lat, lon, alt, hdg, spd = sample
+        grc_final = grc_classifier.final_grc(lat, lon)
+        in_ctrl, arc_label, arc, reason = arc_classifier.air_risk(
+            lat, lon, alt, grc_final)
+        return (t_now, lat, lon, alt, hdg, spd, grc_final, arc_label, arc, reason["rule"])
+
+    last_status = 0.0
+    logged = 0
+    last_logged = None
+
+    def log(row):
+        nonlocal last_status, logged, last_logged
+        t_now, lat, lon, alt, hdg, spd, grc_final, arc_label, arc, rule = row
+        with prof.span("log.csv_write"):
+            flight_log.write(row)
+            if columnar_log:
+                columnar_log.write(row)
+        summary.add(t_now, arc_label, grc_final, rule, lat, lon)
+        logged += 1
+        last_logged = time.perf_counter()
+        if kml:
+            kml.add_point(lat, lon, alt)
+        if feed:
+            feed.add(t_now, lat, lon, alt, grc_final, arc, arc_label, rule)
+        if web:
+            web.update(t_now, arc, grc_final, rule, arc_label, lat, lon, alt)
+
+        # The status line is capped at 10/s, a fast replay would spend its time printing
+        if verbose and time.monotonic() - last_status >= 0.1:
+            last_status = time.monotonic()
+            print(f"t={t_now:6.2f}s | {lat:.6f}, {lon:.6f}, {alt:.1f} m, grc={grc_final}, "
+                  f"{hdg:.1f}°, {spd:.1f} m/s, {arc_label} ({rule})",
+                  end='\r', flush=True)
+
+    # Acquisition never waits on a consumer: the classify queue drops its
+    # oldest samples when full. Classified rows are never dropped: the log
+    # queue is deep enough to absorb long disk stalls and blocks when full,
+    # which pushes back onto the classify queue. The dashboard buffers
+    # whatever is queued and redraws at its own capped frame rate. A replay
+    # blocks at the classify queue too, so every recorded sample is
+    # classified and logged whatever the speed.
+    pipeline = Pipeline()
+    raw_q = pipeline.queue("classify", maxsize=64, policy="block" if source else "drop_oldest")
+    log_q = pipeline.queue("log", maxsize=4096, policy="block")
+    outputs = [log_q]
+    dash_q = None
+    if plt:
+        dash_q = pipeline.queue("dashboard", maxsize=64)
+        outputs.append(dash_q)
+
+    if source:
+        acquisition = pipeline.feed("replay", source, [raw_q])
+    else:
+        acquisition = pipeline.source("acquire", acquire, rate_hz, [raw_q])
+    pipeline.stage("classify", classify, raw_q, outputs)
+    pipeline.stage("log", log, log_q)
+
+    try:
+        pipeline.start()
+
+        # matplotlib must stay on the main thread
+        while not pipeline.stopping() and not pipeline.finished():
+            if dash_q is None:
+                time.sleep(period)
+                continue
+            try:
+                row = dash_q.get(timeout=1 / plt.max_fps)
+            except Empty:
+                row = None
+            # Buffer every queued sample, draw at most plt.max_fps frames/s
+            while row is not None and row is not CLOSED:
+                t_now, lat, lon, alt, hdg, spd, grc_final, arc_label, arc, rule = row
+                plt.record(t_now, arc, grc_final, rule, arc_label, lat, lon)
+                try:
+                    row = dash_q.get(timeout=0)
+                except Empty:
+                    row = None
+            if row is CLOSED:
+                break
+            plt.render()
+
+        if source and not pipeline.error:
+            print("\nReplay finished.")
+
+        if pipeline.error:
+            stage, e = pipeline.error
+            print(f"\nERROR in {stage}: {e}\nSaving CSV before exiting...")
+
+    except KeyboardInterrupt:
+        print("\nStopped by user.")
+
+    except Exception as e:
+        print(f"\nERROR: {e}\nSaving CSV before exiting...")
+
+    finally:
+        # Stops acquisition, then lets classification and logging drain
+        pipeline.stop()
+
+        try:
+            flight_log.close()
+        except Exception as e:
+            print(f"ERROR: flight log not fully written: {e}")
+
+        try:
+            if columnar_log:
+                columnar_log.close()
+        except Exception as e:
+            print(f"ERROR: columnar log not fully written: {e}")
+
+        try:
+            summary.write(summary_path(flight_log.path))
+        except Exception as e:
+            print(f"ERROR: risk summary not written: {e}")
+
+        try:
+            if kml:
+                kml.close()
+        except Exception as e:
+            print(f"[ERROR] KML failed to save: {e}")
+
+        if feed:
+            feed.stop()
+        if web:
+            web.stop()
+
+        try:
+            if client:
+                client.close()
+        except:
+            pass
+
+        print(f"CSV saved as {flight_log.path}")
+        if source:
+            elapsed = (last_logged or time.perf_counter()) - (source.started or time.perf_counter())
+            print(f"Replay: {logged}/{len(source)} samples in {elapsed:.2f} s "
+                  f"({logged / max(elapsed, 1e-9):.0f} samples/s end to end, {source.describe()})")
+        else:
+            print(f"Timing: {acquisition.scheduler.summary()}")
+        print(f"Queues: {pipeline.summary()}")
+
+    return flight_log.path
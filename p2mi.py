@@ -0,0 +1,258 @@
+"""
+P2MI command line entry point.
+
+    python p2mi.py monitor --host 192.168.10.2 --rate 5 --no-dashboard
+    python p2mi.py monitor --replay logs/flight_log_X.csv --speed 0 --no-dashboard
+    python p2mi.py replay flight.rec --rate 50 --interpolate
+    python p2mi.py reclassify logs/flight_log_*.csv --out logs_reclassified
+    python p2mi.py convert logs/flight_log_*.csv
+    python p2mi.py kml logs/flight_log_*.csv
+    python p2mi.py summary logs/flight_log_*.csv
+    python p2mi.py simulate --flights 5000 --seed 1
+    python p2mi.py index logs/flight_log_*.csv
+    python p2mi.py query --zone soetta --max-alt 152.4 --flights
+
+Every sub-command imports only what it needs, so headless monitoring does
+not pay for matplotlib, rasterio or simplekml at startup.
+"""
+import argparse
+import sys
+
+
+def cmd_monitor(args):
+    if args.profile:
+        import instrumentation
+        instrumentation.enable()
+    import monitor
+    monitor.run(xpHost=args.host, xpPort=args.port, rate_hz=args.rate,
+                log_dir=args.log_dir,
+                kml_dir=None if args.no_kml else args.kml_dir or monitor.KML_DIR,
+                dashboard=args.dashboard, timeout=args.timeout, retries=args.retries,
+                verbose=not args.quiet, commit_interval_ms=args.commit_ms,
+                columnar=args.columnar, compress=args.compress, rotate_mb=args.rotate_mb,
+                rotate_minutes=args.rotate_min, kml_feed_port=args.kml_feed,
+                web_port=args.web, replay=args.replay, speed=args.speed)
+
+
+def cmd_replay(args):
+    import xpc
+    import flight_recorder
+    with xpc.XPlaneConnect(args.host, args.port, 0, 1000) as client:
+        print("Starting Playback...")
+        frames = flight_recorder.play(client, args.path, args.rate, args.scale,
+                                      args.interpolate, args.ctrl, args.loop)
+        print(f"Playback Complete ({frames} frames)")
+
+
+def cmd_reclassify(args):
+    import os
+    import time
+    import reclassify
+    start = time.perf_counter()
+    total = 0
+    for path, rows, changed in reclassify.reclassify_many(args.logs, args.out, args.workers):
+        total += rows
+        print(f"{path}: {rows} rows, {changed} changed")
+    elapsed = time.perf_counter() - start
+    print(f"{len(args.logs)} logs, {total} rows in {elapsed:.1f} s "
+          f"({total / max(elapsed, 1e-9):.0f} rows/s); "
+          f"changes in {os.path.join(args.out, 'reclassify_report.csv')}")
+
+
+def cmd_convert(args):
+    import os
+    import columnar_log
+    from flight_logger import log_stem
+    for path in args.logs:
+        out = None
+        if args.out:
+            os.makedirs(args.out, exist_ok=True)
+            out = os.path.join(args.out, os.path.basename(log_stem(path)) + ".p2mc")
+        out = columnar_log.convert_csv(path, out)
+        print(f"{path} -> {out}")
+
+
+def cmd_kml(args):
+    import os
+    import kml_export
+    from flight_logger import log_stem
+    for path in args.logs:
+        out = None
+        if args.out:
+            os.makedirs(args.out, exist_ok=True)
+            out = os.path.join(args.out, os.path.basename(log_stem(path)) + ".kml")
+        out, samples = kml_export.export_kml(path, out)
+        print(f"{path} -> {out} ({samples} samples)")
+
+
+def cmd_summary(args):
+    import risk_summary
+    for path in args.logs:
+        out, summary = risk_summary.summarise_log(path, max_gap_s=args.max_gap)
+        r = summary.result()
+        exposure = ", ".join(f"{k} {v:.0f} s" for k, v in r["arc_exposure_s"].items())
+        print(f"{path} -> {out}: {r['duration_s']:.0f} s, {exposure}; "
+              f"{r['arc_transitions']} ARC transitions, max GRC {r['max_grc']}")
+
+
+def cmd_simulate(args):
+    import json
+    import fleet_sim
+
+    def progress(done, total):
+        print(f"{done}/{total} flights", end="\r", flush=True)
+
+    report = fleet_sim.simulate(flights=args.flights, workers=args.workers, seed=args.seed,
+                                rate_hz=args.rate, batch=args.batch, scalar=args.scalar,
+                                progress=progress)
+    print(json.dumps(report, indent=1))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+    print(f"{report['samples']} samples from {report['flights']} flights in {report['wall_s']:.1f} s: "
+          f"{report['samples_per_s']:.0f} samples/s ({report['classify_samples_per_s']:.0f} "
+          f"samples/s per worker classifying, {report['mode']})")
+
+
+def cmd_index(args):
+    import time
+    from flight_index import FlightIndex
+    start = time.perf_counter()
+    with FlightIndex(args.db) as index:
+        ingested, skipped = index.ingest_many(args.logs)
+        stats = index.stats()
+    print(f"{ingested} logs indexed, {skipped} unchanged in {time.perf_counter() - start:.1f} s; "
+          f"{stats['flights']} flights, {stats['segments']} segments in {args.db}")
+
+
+def cmd_query(args):
+    import time
+    from flight_index import FlightIndex
+    filters = dict(bbox=args.bbox, min_alt=args.min_alt, max_alt=args.max_alt,
+                   min_grc=args.min_grc, arc=args.arc, zone=args.zone)
+    with FlightIndex(args.db) as index:
+        start = time.perf_counter()
+        if args.flights:
+            rows = index.flights(**filters)
+        else:
+            rows = index.segments(limit=args.limit, **filters)
+        elapsed = time.perf_counter() - start
+    for row in rows:
+        if args.flights:
+            print(f"{row['path']}: {row['segments']} segments, {row['seconds']:.1f} s, "
+                  f"first at t={row['first_t']:.1f} s")
+        else:
+            print(f"{row['path']} t={row['t_start']:.1f}-{row['t_end']:.1f} s "
+                  f"{row['arc_label']} GRC {row['grc']} alt {row['min_alt']:.0f}-"
+                  f"{row['max_alt']:.0f} m ({row['rule']})")
+    print(f"{len(rows)} {'flights' if args.flights else 'segments'} in {elapsed * 1e3:.1f} ms")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="p2mi", description="P2MI SORA risk monitor")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_connection(p):
+        p.add_argument("--host", default="192.168.10.2", help="X-Plane host")
+        p.add_argument("--port", type=int, default=49009, help="XPC plugin port")
+
+    p = sub.add_parser("monitor", help="monitor X-Plane and classify GRC/ARC live")
+    add_connection(p)
+    p.add_argument("--rate", type=float, default=2, help="sample rate (Hz)")
+    p.add_argument("--log-dir", help="folder for the CSV log (default: logs, logs_replay for --replay)")
+    p.add_argument("--kml-dir",
+                   help="folder for the KML track (default: flight_path, flight_path_replay for --replay)")
+    p.add_argument("--no-kml", action="store_true", help="do not write a KML track")
+    p.add_argument("--kml-feed", type=int, metavar="PORT",
+                   help="serve a live Google Earth NetworkLink on this port")
+    p.add_argument("--dashboard", action=argparse.BooleanOptionalAction, default=True,
+                   help="show the matplotlib dashboard")
+    p.add_argument("--web", type=int, metavar="PORT",
+                   help="serve the browser dashboard on this port")
+    p.add_argument("--commit-ms", type=float, default=200,
+                   help="flight log commit interval, i.e. most data lost on a crash (ms)")
+    p.add_argument("--columnar", action="store_true",
+                   help="also write a columnar .p2mc log next to the CSV")
+    p.add_argument("--compress", choices=["gzip", "zstd"], help="compress the flight log")
+    p.add_argument("--rotate-mb", type=float, help="start a new log segment every N MB")
+    p.add_argument("--rotate-min", type=float, help="start a new log segment every N minutes")
+    p.add_argument("--timeout", type=int, default=100, help="X-Plane request timeout (ms)")
+    p.add_argument("--retries", type=int, default=2, help="X-Plane request retries")
+    p.add_argument("--profile", action="store_true", help="enable latency instrumentation")
+    p.add_argument("--quiet", action="store_true", help="no per-sample console output")
+    p.add_argument("--replay", metavar="LOG",
+                   help="take the samples from a flight log, .p2mc or recording instead of X-Plane")
+    p.add_argument("--speed", type=float, default=1.0,
+                   help="replay speed (2 = twice real time, 0 = as fast as possible)")
+    p.set_defaults(func=cmd_monitor)
+
+    p = sub.add_parser("replay", help="replay a flight_recorder recording into X-Plane")
+    add_connection(p)
+    p.add_argument("path", help="recording written by flight_recorder")
+    p.add_argument("--rate", type=float, help="output rate (Hz), default: recorded timestamps")
+    p.add_argument("--scale", type=float, default=1.0, help="time scale (2 = twice as fast)")
+    p.add_argument("--interpolate", action="store_true")
+    p.add_argument("--ctrl", action="store_true", help="also replay control surfaces")
+    p.add_argument("--loop", action="store_true")
+    p.set_defaults(func=cmd_replay)
+
+    p = sub.add_parser("reclassify", help="re-run GRC/ARC classification over flight logs")
+    p.add_argument("logs", nargs="+", help="flight_log_*.csv files or .manifest.json")
+    p.add_argument("--out", required=True, help="output folder")
+    p.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    p.set_defaults(func=cmd_reclassify)
+
+    p = sub.add_parser("convert", help="convert CSV flight logs to the columnar format")
+    p.add_argument("logs", nargs="+", help="flight_log_*.csv files or .manifest.json")
+    p.add_argument("--out", help="output folder (default: next to each log)")
+    p.set_defaults(func=cmd_convert)
+
+    p = sub.add_parser("kml", help="export flight logs as time-stamped, risk-coloured KML")
+    p.add_argument("logs", nargs="+", help="flight_log_*.csv files or .manifest.json")
+    p.add_argument("--out", help="output folder (default: next to each log)")
+    p.set_defaults(func=cmd_kml)
+
+    p = sub.add_parser("summary", help="write risk-exposure summaries next to flight logs")
+    p.add_argument("logs", nargs="+", help="flight_log_*.csv files or .manifest.json")
+    p.add_argument("--max-gap", type=float, default=5.0,
+                   help="longest interval a sample is held for (s)")
+    p.set_defaults(func=cmd_summary)
+
+    p = sub.add_parser("simulate", help="classify random synthetic flights (Monte Carlo / load test)")
+    p.add_argument("--flights", type=int, default=1000)
+    p.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--rate", type=float, default=2, help="sample rate of the flights (Hz)")
+    p.add_argument("--batch", type=int, default=50, help="flights per worker task")
+    p.add_argument("--scalar", action="store_true",
+                   help="classify with per-sample final_grc/air_risk, as the live loop does")
+    p.add_argument("--out", help="also write the report to this JSON file")
+    p.set_defaults(func=cmd_simulate)
+
+    p = sub.add_parser("index", help="add flight logs to the SQLite archive index")
+    p.add_argument("logs", nargs="+", help="flight_log_*.csv files or .manifest.json")
+    p.add_argument("--db", default="logs/flight_index.sqlite")
+    p.set_defaults(func=cmd_index)
+
+    p = sub.add_parser("query", help="query the archive index")
+    p.add_argument("--db", default="logs/flight_index.sqlite")
+    p.add_argument("--bbox", type=float, nargs=4, metavar=("WEST", "SOUTH", "EAST", "NORTH"))
+    p.add_argument("--zone", choices=["halim", "soetta"])
+    p.add_argument("--min-alt", type=float, help="segments reaching above (m)")
+    p.add_argument("--max-alt", type=float, help="segments reaching below (m)")
+    p.add_argument("--min-grc", type=int)
+    p.add_argument("--arc", help="ARC label, e.g. ARC-d")
+    p.add_argument("--flights", action="store_true", help="list flights instead of segments")
+    p.add_argument("--limit", type=int, default=200, help="most segments to list")
+    p.set_defaults(func=cmd_query)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
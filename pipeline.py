@@ -0,0 +1,243 @@
+import threading
+from collections import deque
+from queue import Empty
+
+import instrumentation
+from rate_scheduler import RateScheduler
+
+# Put into a queue once its producer has finished
+CLOSED = object()
+
+
+class BoundedQueue:
+    """
+    Bounded FIFO between two pipeline stages with an explicit overflow policy:
+        - "block":        the producer waits for space (backpressure)
+        - "drop_newest":  the new item is discarded
+        - "drop_oldest":  the oldest queued item is discarded to make room
+    """
+
+    POLICIES = ("block", "drop_newest", "drop_oldest")
+
+    def __init__(self, name, maxsize, policy="drop_oldest"):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1.")
+        if policy not in self.POLICIES:
+            raise ValueError(f"policy must be one of {self.POLICIES}.")
+        self.name = name
+        self.maxsize = maxsize
+        self.policy = policy
+
+        self._items = deque()
+        self._cv = threading.Condition()
+        self._closed = False
+
+        # Counters
+        self.put_count = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    def put(self, item):
+        """Queue an item. Returns False if the item itself was not queued."""
+        with self._cv:
+            if self._closed:
+                return False
+            if len(self._items) >= self.maxsize:
+                if self.policy == "drop_newest":
+                    self.dropped += 1
+                    return False
+                elif self.policy == "drop_oldest":
+                    self._items.popleft()
+                    self.dropped += 1
+                else:
+                    while len(self._items) >= self.maxsize and not self._closed:
+                        self._cv.wait()
+                    if self._closed:
+                        return False
+
+            self._items.append(item)
+            self.put_count += 1
+            self.max_depth = max(self.max_depth, len(self._items))
+            self._cv.notify_all()
+            return True
+
+    def get(self, timeout=None):
+        """Next item, CLOSED once the queue is closed and empty. Raises queue.Empty on timeout."""
+        with self._cv:
+            if not self._items and not self._closed:
+                self._cv.wait_for(lambda: self._items or self._closed, timeout)
+            if self._items:
+                item = self._items.popleft()
+                self._cv.notify_all()
+                return item
+            if self._closed:
+                return CLOSED
+            raise Empty
+
+    def close(self):
+        with self._cv:
+            self._closed = True
+            self._cv.notify_all()
+
+    def depth(self):
+        with self._cv:
+            return len(self._items)
+
+    def stats(self):
+        return {
+            "depth": self.depth(),
+            "max_depth": self.max_depth,
+            "maxsize": self.maxsize,
+            "policy": self.policy,
+            "put": self.put_count,
+            "dropped": self.dropped,
+        }
+
+
+class _Worker:
+    def __init__(self, pipeline, name, fn, outputs):
+        self.pipeline = pipeline
+        self.name = name
+        self.fn = instrumentation.timed("stage." + name)(fn)
+        self.outputs = list(outputs)
+        self.processed = 0
+        self.thread = threading.Thread(target=self._main, name=name, daemon=True)
+
+    def _emit(self, item):
+        if item is None:
+            return
+        for q in self.outputs:
+            q.put(item)
+
+    def _main(self):
+        try:
+            self._run()
+        except Exception as e:
+            self.pipeline.fail(self.name, e)
+        finally:
+            for q in self.outputs:
+                q.close()
+
+
+class Source(_Worker):
+    """Calls fn() at a fixed rate and forwards every non-None result."""
+
+    def __init__(self, pipeline, name, fn, rate_hz, outputs, policy="skip"):
+        super().__init__(pipeline, name, fn, outputs)
+        self.scheduler = RateScheduler(rate_hz, policy)
+
+    def _run(self):
+        while not self.pipeline.stopping():
+            self.scheduler.wait()
+            if self.pipeline.stopping():
+                break
+            self._emit(self.fn())
+            self.processed += 1
+
+
+class Feed(_Worker):
+    """Forwards every item of an iterable, which does its own pacing."""
+
+    def __init__(self, pipeline, name, items, outputs):
+        super().__init__(pipeline, name, lambda item: item, outputs)
+        self.items = items
+
+    def _run(self):
+        for item in self.items:
+            if self.pipeline.stopping():
+                break
+            self._emit(self.fn(item))
+            self.processed += 1
+
+
+class Stage(_Worker):
+    """Calls fn(item) for every item of its inbox and forwards every non-None result."""
+
+    def __init__(self, pipeline, name, fn, inbox, outputs=()):
+        super().__init__(pipeline, name, fn, outputs)
+        self.inbox = inbox
+
+    def _run(self):
+        while True:
+            item = self.inbox.get()
+            if item is CLOSED:
+                break
+            self._emit(self.fn(item))
+            self.processed += 1
+
+
+class Pipeline:
+    """
+    Stages connected by bounded queues, each stage in its own thread.
+
+    stop() stops the sources; every stage then drains its inbox and closes
+    its outputs, so everything that was queued is still processed. An
+    exception in any stage stops the whole pipeline and is kept in `error`.
+    """
+
+    def __init__(self):
+        self.queues = []
+        self.workers = []
+        self.error = None
+        self._stop = threading.Event()
+
+    def queue(self, name, maxsize, policy="drop_oldest"):
+        q = BoundedQueue(name, maxsize, policy)
+        self.queues.append(q)
+        return q
+
+    def source(self, name, fn, rate_hz, outputs, policy="skip"):
+        worker = Source(self, name, fn, rate_hz, outputs, policy)
+        self.workers.append(worker)
+        return worker
+
+    def feed(self, name, items, outputs):
+        worker = Feed(self, name, items, outputs)
+        self.workers.append(worker)
+        return worker
+
+    def stage(self, name, fn, inbox, outputs=()):
+        worker = Stage(self, name, fn, inbox, outputs)
+        self.workers.append(worker)
+        return worker
+
+    def start(self):
+        for worker in self.workers:
+            worker.thread.start()
+
+    def stopping(self):
+        return self._stop.is_set()
+
+    def finished(self):
+        """True once every source has run out and every stage has drained."""
+        return all(not worker.thread.is_alive() for worker in self.workers)
+
+    def fail(self, name, error):
+        if self.error is None:
+            self.error = (name, error)
+        self._stop.set()
+        # Wake producers blocked on a queue whose consumer is gone; queued
+        # items are still delivered to the consumers that are alive
+        for q in self.queues:
+            q.close()
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        for worker in self.workers:
+            if worker.thread.is_alive():
+                worker.thread.join(timeout)
+
+    def stats(self):
+        stats = {
+            "queues": {q.name: q.stats() for q in self.queues},
+            "stages": {w.name: w.processed for w in self.workers},
+        }
+        for worker in self.workers:
+            if isinstance(worker, Source):
+                stats[worker.name] = worker.scheduler.stats()
+        return stats
+
+    def summary(self):
+        parts = [f"{q.name}: depth {q.depth()}/{q.maxsize} (max {q.max_depth}), "
+                 f"dropped {q.dropped}" for q in self.queues]
+        return "; ".join(parts)
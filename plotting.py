@@ -1,15 +1,26 @@
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
+import time
 from collections import deque
 
+import matplotlib.pyplot as plt
+import numpy as np
+
+import pop_tiles
+
 # ===========================
 # DASHBOARD DATA BUFFERS
 # ===========================
 max_samples = 200  # history window length
+max_fps = 10       # redraw cap, independent of the sample rate
 
 times = deque(maxlen=max_samples)
 arc_history = deque(maxlen=max_samples)
 grc_history = deque(maxlen=max_samples)
+latest = {}        # reason_text / arc_label / arc / grc / lat / lon of the newest sample
+
+# Population raster around the aircraft (tiles load in the background)
+pop_path = pop_tiles.POP_GEOTIFF_FILE_PATH
+pop_radius_px = 32
+pop = None
 
 # ===========================
 # COLOR MAP FOR RISK LEVELS
@@ -18,6 +29,8 @@ grc_history = deque(maxlen=max_samples)
 
 def risk_color(level):
     """Return color based on risk level."""
+    if level is None:
+        return "black"
     if level <= 1:
         return "green"
     elif level == 2:
@@ -30,87 +43,198 @@ def risk_color(level):
 
 
 # ===========================
-# FIGURE LAYOUT
+# FIGURE LAYOUT (created on first render)
 # ===========================
-plt.style.use("ggplot")
-fig = plt.figure(figsize=(12, 7))
-
-# ARC plot (top left)
-ax_arc = plt.subplot2grid((3, 2), (0, 0))
-ax_arc.set_title("ARC Plot")
-
-# GRC plot (top right)
-ax_grc = plt.subplot2grid((3, 2), (0, 1))
-ax_grc.set_title("GRC Plot")
-
-# Reason for ARC (middle left)
-ax_arc_reason = plt.subplot2grid((3, 2), (1, 0))
-ax_arc_reason.axis("off")
-
-# Population Density (middle right) (TODO)
-ax_pop = plt.subplot2grid((3, 2), (1, 1))
-ax_pop.axis("off")
-
-# Current ARC level (bottom left)
-ax_arc_level = plt.subplot2grid((3, 2), (2, 0))
-ax_arc_level.axis("off")
-
-# Current GRC level (bottom right)
-ax_grc_level = plt.subplot2grid((3, 2), (2, 1))
-ax_grc_level.axis("off")
-
-
-# =======================================
-# UPDATE FUNCTION (CALLED EACH NEW SAMPLE)
-# =======================================
-def update_dashboard(t_now, arc, grc, reason_text, arc_label):
-    # Append data
-    times.append(t_now)
-    arc_history.append(arc)
-    grc_history.append(grc)
-
-    # ----- ARC Plot -----
-    ax_arc.clear()
-    ax_arc.plot(times, arc_history, color=risk_color(arc))
+fig = None
+_artists = {}       # name -> artist, all animated (drawn by us, not by fig draws)
+_backgrounds = {}   # axes -> cached background without the animated artists
+_shown = {}         # text artist name -> last text, to skip unchanged axes
+_last_render = 0.0
+_dirty = False
+_pop_shown = None   # (pixel, tiles loaded) of the heat-map on screen
+
+
+def _setup():
+    global fig, pop
+    pop = pop_tiles.PopulationTiles(pop_path)
+    plt.style.use("ggplot")
+    fig = plt.figure(figsize=(12, 7))
+
+    # ARC plot (top left)
+    ax_arc = plt.subplot2grid((3, 2), (0, 0))
     ax_arc.set_title("ARC Plot")
     ax_arc.set_ylabel("ARC Level")
     ax_arc.set_ylim(0, 5)  # modify if different scale
 
-    # ----- GRC Plot -----
-    ax_grc.clear()
-    ax_grc.plot(times, grc_history, color=risk_color(grc))
+    # GRC plot (top right)
+    ax_grc = plt.subplot2grid((3, 2), (0, 1))
     ax_grc.set_title("GRC Plot")
     ax_grc.set_ylabel("GRC Level")
     ax_grc.set_ylim(0, 10)  # modify if different scale
 
-    # ----- ARC Reason -----
-    ax_arc_reason.clear()
+    # Reason for ARC (middle left)
+    ax_arc_reason = plt.subplot2grid((3, 2), (1, 0))
     ax_arc_reason.axis("off")
-    ax_arc_reason.text(0.5, 0.5, f"Reason:\n{reason_text}",
-                       ha="center", va="center", fontsize=10)
 
-    # ----- Population Density (TODO) -----
-    ax_pop.clear()
+    # Population Density (middle right)
+    ax_pop = plt.subplot2grid((3, 2), (1, 1))
     ax_pop.axis("off")
-    ax_pop.text(0.5, 0.5,
-                f"Population Density:\n[TODO: add pop density]",
-                ha="center", va="center", fontsize=10)
 
-    # ----- Current ARC Level -----
-    ax_arc_level.clear()
+    # Current ARC level (bottom left)
+    ax_arc_level = plt.subplot2grid((3, 2), (2, 0))
     ax_arc_level.axis("off")
-    ax_arc_level.text(0.5, 0.5,
-                      f"Current ARC Level = {arc_label}",
-                      ha="center", va="center", fontsize=12,
-                      fontweight="bold", color=risk_color(arc))
 
-    # ----- Current GRC Level -----
-    ax_grc_level.clear()
+    # Current GRC level (bottom right)
+    ax_grc_level = plt.subplot2grid((3, 2), (2, 1))
     ax_grc_level.axis("off")
-    ax_grc_level.text(0.5, 0.5,
-                      f"Current GRC Level = {grc}",
-                      ha="center", va="center", fontsize=12,
-                      fontweight="bold", color=risk_color(grc))
 
-    # Redraw Dashboard
-    plt.pause(0.001)
+    (_artists["arc_line"],) = ax_arc.plot([], [], animated=True)
+    (_artists["grc_line"],) = ax_grc.plot([], [], animated=True)
+    _artists["reason"] = ax_arc_reason.text(0.5, 0.5, "", ha="center", va="center",
+                                            fontsize=10, animated=True)
+    _artists["pop_map"] = ax_pop.imshow(
+        np.full((2 * pop_radius_px, 2 * pop_radius_px), np.nan), cmap="inferno",
+        interpolation="nearest",
+        extent=(0.45, 0.95, 0, 1), aspect="auto", vmin=0, vmax=1, animated=True)
+    ax_pop.set_xlim(0, 1)
+    ax_pop.set_ylim(0, 1)
+    (_artists["pop_aircraft"],) = ax_pop.plot([0.7], [0.5], "c+", markersize=10, animated=True)
+    _artists["pop"] = ax_pop.text(0.02, 0.5, "", ha="left", va="center", fontsize=10,
+                                  animated=True)
+    _artists["arc_level"] = ax_arc_level.text(0.5, 0.5, "", ha="center", va="center",
+                                              fontsize=12, fontweight="bold", animated=True)
+    _artists["grc_level"] = ax_grc_level.text(0.5, 0.5, "", ha="center", va="center",
+                                              fontsize=12, fontweight="bold", animated=True)
+
+    # Any full redraw (first show, resize, x-axis shift) refreshes the backgrounds
+    fig.canvas.mpl_connect("draw_event", _on_draw)
+    plt.show(block=False)
+    fig.canvas.draw()
+
+
+def _on_draw(event):
+    global _pop_shown
+    _backgrounds.clear()
+    for artist in _artists.values():
+        if artist.axes not in _backgrounds:
+            _backgrounds[artist.axes] = fig.canvas.copy_from_bbox(artist.axes.bbox)
+    for artist in _artists.values():
+        fig.draw_artist(artist)
+    _shown.clear()
+    _pop_shown = None
+
+
+def _set_text(name, text, color=None):
+    """Update a text artist; returns its axes if it changed, else None."""
+    if _shown.get(name) == (text, color):
+        return None
+    _shown[name] = (text, color)
+    artist = _artists[name]
+    artist.set_text(text)
+    if color is not None:
+        artist.set_color(color)
+    return artist.axes
+
+
+def _update_pop():
+    """Density readout and heat-map from cached tiles only; never waits for a read."""
+    global _pop_shown
+    lat, lon = latest.get("lat"), latest.get("lon")
+    if not pop.available:
+        return _set_text("pop", f"Population Density:\nn/a ({pop.error})")
+    if lat is None or lon is None:
+        return _set_text("pop", "Population Density:\nno position")
+    density = pop.lookup(lat, lon)
+    text = "loading..." if density is None else f"{density:,.0f} /km²"
+    changed = _set_text("pop", f"Population Density:\n{text}")
+
+    # Only rebuild the image when the aircraft moved a pixel or tiles arrived
+    shown = (pop.pixel(lat, lon), pop.loads)
+    if shown == _pop_shown:
+        return changed
+    _pop_shown = shown
+    patch = pop.heatmap(lat, lon, pop_radius_px)
+    image = _artists["pop_map"]
+    image.set_data(patch)
+    if not np.all(np.isnan(patch)):
+        image.set_clim(0, max(float(np.nanmax(patch)), 1.0))
+    return image.axes
+
+
+def _needs_full_redraw():
+    """Shift the time axes in steps; only then are the ticks redrawn."""
+    t_min, t_max = times[0], times[-1]
+    ax = _artists["arc_line"].axes
+    left, right = ax.get_xlim()
+    if left <= t_min and t_max <= right and right - left <= 2 * (t_max - t_min) + 1:
+        return False
+    span = max(t_max - t_min, 1.0)
+    for name in ("arc_line", "grc_line"):
+        _artists[name].axes.set_xlim(t_min, t_min + 1.5 * span)
+    return True
+
+
+def render(force=False):
+    """
+    Redraw from the buffers if 1/max_fps has passed since the last frame.
+    Only the axes whose artists changed are blitted.
+    """
+    global _last_render, _dirty
+    now = time.monotonic()
+    if not times or (not force and (not _dirty or now - _last_render < 1.0 / max_fps)):
+        if fig is not None:
+            fig.canvas.flush_events()  # keep the window responsive
+        return False
+    _last_render = now
+    _dirty = False
+    if fig is None:
+        _setup()
+
+    arc, grc = latest["arc"], latest["grc"]
+    changed = set()
+    for name, history, level in (("arc_line", arc_history, arc), ("grc_line", grc_history, grc)):
+        line = _artists[name]
+        line.set_data(times, history)
+        line.set_color(risk_color(level))
+        changed.add(line.axes)
+    for axes in (
+        _set_text("reason", f"Reason:\n{latest['reason_text']}"),
+        _update_pop(),
+        _set_text("arc_level", f"Current ARC Level = {latest['arc_label']}", risk_color(arc)),
+        _set_text("grc_level", f"Current GRC Level = {grc}", risk_color(grc)),
+    ):
+        if axes is not None:
+            changed.add(axes)
+
+    canvas = fig.canvas
+    if _needs_full_redraw() or not canvas.supports_blit or not _backgrounds:
+        # draw_event re-caches the backgrounds and draws the animated artists
+        canvas.draw()
+    else:
+        for axes in changed:
+            canvas.restore_region(_backgrounds[axes])
+            for artist in _artists.values():
+                if artist.axes is axes:
+                    axes.draw_artist(artist)
+            canvas.blit(axes.bbox)
+    canvas.flush_events()
+    return True
+
+
+# =======================================
+# UPDATE FUNCTION (CALLED EACH NEW SAMPLE)
+# =======================================
+def record(t_now, arc, grc, reason_text, arc_label, lat=None, lon=None):
+    """Buffer one sample without drawing."""
+    global _dirty
+    _dirty = True
+    times.append(t_now)
+    arc_history.append(arc)
+    grc_history.append(grc)
+    latest.update(arc=arc, grc=grc, reason_text=reason_text, arc_label=arc_label,
+                  lat=lat, lon=lon)
+
+
+def update_dashboard(t_now, arc, grc, reason_text, arc_label, lat=None, lon=None):
+    record(t_now, arc, grc, reason_text, arc_label, lat, lon)
+    render()
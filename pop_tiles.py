@@ -0,0 +1,177 @@
+"""
+Population density from a GeoTIFF, read in cached tiles off the caller's
+thread.
+
+    tiles = PopulationTiles(POP_GEOTIFF_FILE_PATH)
+    density = tiles.lookup(lat, lon)        # None until the tile is loaded
+    patch = tiles.heatmap(lat, lon)         # NaN where not loaded yet
+
+lookup() and heatmap() only ever read tiles already in the LRU cache; a
+miss queues the tile (and its neighbours) for a background thread that
+does the windowed rasterio read. Newest requests are served first, so a
+fast-moving aircraft does not wait behind tiles it has already left.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+POP_GEOTIFF_FILE_PATH = 'POP_IDN.tif'
+
+
+class PopulationTiles:
+    """
+    tile_px: tile edge in raster pixels, cache_tiles: tiles kept in memory,
+    max_pending: queued tile loads (oldest requests are dropped beyond it).
+    """
+
+    def __init__(self, path, tile_px=128, cache_tiles=64, max_pending=16):
+        self.path = path
+        self.tile_px = tile_px
+        self.cache_tiles = cache_tiles
+        self.max_pending = max_pending
+
+        self.available = os.path.exists(path)
+        self.error = None if self.available else f"'{path}' not found"
+        self._src = None
+        self._transformer = None
+        self._ready = threading.Event()
+
+        self._cache = OrderedDict()   # (tile_row, tile_col) -> float32 array
+        self._pending = []            # newest last
+        self._cv = threading.Condition()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.dropped = 0
+
+        if self.available:
+            threading.Thread(target=self._run, name="pop-tiles", daemon=True).start()
+
+    # --- Background loader ---
+    def _open(self):
+        # Heavy imports stay off the import path of the dashboard
+        import rasterio
+        from pyproj import Transformer
+
+        self._src = rasterio.open(self.path)
+        self._transformer = Transformer.from_crs("EPSG:4326", self._src.crs, always_xy=True)
+        self._inverse = ~self._src.transform
+        self._ready.set()
+
+    def _load(self, key):
+        from rasterio.windows import Window
+
+        row, col = key[0] * self.tile_px, key[1] * self.tile_px
+        window = Window(col, row, min(self.tile_px, self._src.width - col),
+                        min(self.tile_px, self._src.height - row))
+        data = self._src.read(1, window=window).astype(np.float32)
+        if self._src.nodata is not None:
+            data[data == self._src.nodata] = np.nan
+        data[data < 0] = np.nan
+        return data
+
+    def _run(self):
+        try:
+            self._open()
+        except Exception as e:
+            self.error = f"failed to open '{self.path}': {e}"
+            self.available = False
+            print(f"ERROR: {self.error}")
+            return
+        while True:
+            with self._cv:
+                while not self._pending:
+                    self._cv.wait()
+                key = self._pending.pop()
+            try:
+                data = self._load(key)
+            except Exception as e:
+                self.error = f"tile {key}: {e}"
+                continue
+            with self._cv:
+                self._cache[key] = data
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_tiles:
+                    self._cache.popitem(last=False)
+                self.loads += 1
+
+    # --- Non-blocking reads ---
+    def pixel(self, lat, lon):
+        """(row, col) of lat/lon in the raster, None if it is not open yet."""
+        if not self._ready.is_set():
+            return None
+        x, y = self._transformer.transform(lon, lat)
+        col, row = self._inverse * (x, y)
+        return int(np.floor(row)), int(np.floor(col))
+
+    def _tile(self, key):
+        """Cached tile or None; a miss queues the load. Call with self._cv held."""
+        data = self._cache.get(key)
+        if data is not None:
+            self._cache.move_to_end(key)
+            return data
+        if key not in self._pending:
+            self._pending.append(key)
+            if len(self._pending) > self.max_pending:
+                self._pending.pop(0)
+                self.dropped += 1
+            self._cv.notify()
+        return None
+
+    def _in_raster(self, row, col):
+        return 0 <= row < self._src.height and 0 <= col < self._src.width
+
+    def lookup(self, lat, lon):
+        """Population density at lat/lon, or None if not (yet) available."""
+        pixel = self.pixel(lat, lon)
+        if pixel is None or not self._in_raster(*pixel):
+            return None
+        row, col = pixel
+        key = (row // self.tile_px, col // self.tile_px)
+        with self._cv:
+            # Prefetch the neighbours first so the tile under the aircraft is served first
+            for dr in (-1, 0, 1):
+                for dc in (-1, 0, 1):
+                    if (dr or dc) and self._in_raster((key[0] + dr) * self.tile_px,
+                                                      (key[1] + dc) * self.tile_px):
+                        self._tile((key[0] + dr, key[1] + dc))
+            data = self._tile(key)
+        if data is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        value = data[row - key[0] * self.tile_px, col - key[1] * self.tile_px]
+        return None if np.isnan(value) else float(value)
+
+    def heatmap(self, lat, lon, radius_px=32):
+        """(2*radius_px)^2 window of the raster around lat/lon, NaN where not loaded."""
+        out = np.full((2 * radius_px, 2 * radius_px), np.nan, dtype=np.float32)
+        pixel = self.pixel(lat, lon)
+        if pixel is None:
+            return out
+        top, left = pixel[0] - radius_px, pixel[1] - radius_px
+        bottom, right = top + 2 * radius_px, left + 2 * radius_px
+        t = self.tile_px
+        with self._cv:
+            for tr in range(max(top, 0) // t, (max(bottom, 1) - 1) // t + 1):
+                for tc in range(max(left, 0) // t, (max(right, 1) - 1) // t + 1):
+                    if not self._in_raster(tr * t, tc * t):
+                        continue
+                    data = self._tile((tr, tc))
+                    if data is None:
+                        continue
+                    # Overlap of this tile with the window, in raster pixels
+                    r0, r1 = max(top, tr * t), min(bottom, tr * t + data.shape[0])
+                    c0, c1 = max(left, tc * t), min(right, tc * t + data.shape[1])
+                    if r0 < r1 and c0 < c1:
+                        out[r0 - top:r1 - top, c0 - left:c1 - left] = \
+                            data[r0 - tr * t:r1 - tr * t, c0 - tc * t:c1 - tc * t]
+        return out
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "loads": self.loads,
+                "dropped": self.dropped, "cached": len(self._cache), "error": self.error}
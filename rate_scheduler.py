@@ -0,0 +1,126 @@
+import bisect
+import time
+
+# Histogram bucket upper bounds in milliseconds (last bucket is open ended)
+BUCKETS_MS = (0.1, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram of durations in milliseconds.
+    """
+
+    def __init__(self, bounds=BUCKETS_MS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value_ms):
+        self.counts[bisect.bisect_left(self.bounds, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        self.min = value_ms if self.min is None else min(self.min, value_ms)
+        self.max = value_ms if self.max is None else max(self.max, value_ms)
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def as_dict(self):
+        labels = [f"<={b}" for b in self.bounds] + [f">{self.bounds[-1]}"]
+        return {
+            "count": self.count,
+            "mean_ms": self.mean(),
+            "min_ms": self.min,
+            "max_ms": self.max,
+            "buckets": {label: n for label, n in zip(labels, self.counts) if n},
+        }
+
+
+class RateScheduler:
+    """
+    Fixed-rate loop timing on absolute time.monotonic() deadlines.
+
+    Call wait() at the top of every iteration. Deadlines are start + k * period,
+    so processing time does not add to the period. When an iteration overruns
+    its deadline, the policy decides what happens next:
+        - "skip":     missed deadlines are dropped, the loop realigns to the grid
+        - "catchup":  missed ticks run back to back until the loop is on time
+    Per-tick lateness (wake time - deadline) and jitter (tick interval - period)
+    are recorded in histograms.
+    """
+
+    POLICIES = ("skip", "catchup")
+
+    def __init__(self, rate_hz, policy="skip"):
+        if rate_hz <= 0:
+            raise ValueError("rate_hz must be positive.")
+        if policy not in self.POLICIES:
+            raise ValueError(f"policy must be one of {self.POLICIES}.")
+
+        self.rate_hz = rate_hz
+        self.period = 1.0 / rate_hz
+        self.policy = policy
+
+        self.ticks = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.lateness = Histogram()
+        self.jitter = Histogram()
+
+        self._start = None
+        self._deadline = None
+        self._last_tick = None
+
+    def wait(self):
+        """Block until the next tick. Returns the lateness of this tick in seconds."""
+        now = time.monotonic()
+        if self._deadline is None:
+            self._start = self._deadline = now
+        elif now > self._deadline:
+            self.overruns += 1
+            if self.policy == "skip":
+                missed = int((now - self._deadline) / self.period)
+                self.skipped += missed
+                self._deadline += missed * self.period
+        else:
+            time.sleep(self._deadline - now)
+
+        woke = time.monotonic()
+        late = max(0.0, woke - self._deadline)
+        self.lateness.add(late * 1000.0)
+        if self._last_tick is not None:
+            self.jitter.add(abs(woke - self._last_tick - self.period) * 1000.0)
+        self._last_tick = woke
+
+        self.ticks += 1
+        self._deadline += self.period
+        return late
+
+    def elapsed(self):
+        """Seconds since the first tick."""
+        return 0.0 if self._start is None else time.monotonic() - self._start
+
+    def achieved_rate(self):
+        elapsed = self.elapsed()
+        return (self.ticks - 1) / elapsed if self.ticks > 1 and elapsed > 0 else 0.0
+
+    def stats(self):
+        return {
+            "rate_hz": self.rate_hz,
+            "achieved_hz": self.achieved_rate(),
+            "policy": self.policy,
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "lateness": self.lateness.as_dict(),
+            "jitter": self.jitter.as_dict(),
+        }
+
+    def summary(self):
+        return (f"{self.ticks} ticks at {self.achieved_rate():.2f}/{self.rate_hz:g} Hz, "
+                f"{self.overruns} overruns, {self.skipped} skipped, "
+                f"lateness mean {self.lateness.mean():.2f} ms max {self.lateness.max or 0:.2f} ms, "
+                f"jitter mean {self.jitter.mean():.2f} ms max {self.jitter.max or 0:.2f} ms")
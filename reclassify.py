@@ -0,0 +1,128 @@
+"""
+Batch re-classification of flight logs after the airspace KMLs or the GRC
+raster changed.
+
+    python p2mi.py reclassify logs/flight_log_*.csv --out logs_reclassified
+
+Each log is read into column arrays and classified in one go with
+grc_classifier.final_grc_many and arc_classifier.air_risk_many; logs are
+spread over a process pool. Every changed classification is listed in
+<out>/reclassify_report.csv.
+"""
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import arc_classifier
+import grc_classifier
+from flight_logger import LOG_HEADER, log_segments, log_stem, open_log_file
+
+REPORT_HEADER = ["log", "t_sec", "lat", "lon", "alt_m", "old_grc", "grc",
+                 "old_arc_label", "arc_label", "arc_rule"]
+
+NUMERIC = ["t_sec", "lat", "lon", "alt_m", "hdg_deg", "spd_mps"]
+
+
+def read_columns(path):
+    """
+    Flight log (old 8-column or current 10-column schema, plain, compressed
+    or segmented) as a dict of arrays: floats for NUMERIC, int grc (-1 when
+    missing) and object arc_label.
+    """
+    parts = {name: [] for name in NUMERIC + ["grc", "arc_label"]}
+    for segment in log_segments(path):
+        with open_log_file(segment, "r") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                continue
+            rows = []
+            try:
+                rows.extend(reader)
+            except EOFError:
+                pass  # compressed segment still open when its writer stopped
+        if rows and len(rows[-1]) < len(header):
+            rows.pop()  # row cut by a crash
+        if not rows:
+            continue
+        # Transpose once; the numeric columns are parsed by NumPy
+        columns = dict(zip(header, zip(*rows)))
+        for name in NUMERIC:
+            parts[name].append(np.array(columns[name], dtype=float))
+        grc = columns.get("grc", ("",) * len(rows))
+        parts["grc"].append(np.array([int(g) if g else -1 for g in grc], dtype=np.int8))
+        parts["arc_label"].append(np.array(columns["arc_label"], dtype=object))
+
+    empty = {"grc": np.int8, "arc_label": object}
+    return {name: np.concatenate(chunks) if chunks else np.empty(0, dtype=empty.get(name, float))
+            for name, chunks in parts.items()}
+
+
+def reclassify_file(src, out_dir):
+    """
+    Re-run GRC/ARC classification over every row of `src` and write the result
+    with the current schema to out_dir/<same name>.csv (segmented and
+    compressed logs are written back as one plain CSV).
+    Returns (rows, changes) with one REPORT_HEADER row per sample whose GRC
+    or ARC label changed.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    dst = os.path.join(out_dir, os.path.basename(log_stem(src)) + ".csv")
+    if os.path.abspath(dst) == os.path.abspath(src):
+        raise ValueError("out_dir must differ from the folder of the input log.")
+
+    d = read_columns(src)
+    grc = grc_classifier.final_grc_many(d["lat"], d["lon"])
+    _, labels, arc, rules = arc_classifier.air_risk_many(d["lat"], d["lon"], d["alt_m"], grc)
+
+    grc_out = [None if g < 0 else g for g in grc.tolist()]
+    arc_out = [None if a < 0 else a for a in arc.tolist()]
+    with open(dst, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(LOG_HEADER)
+        writer.writerows(zip(*(d[name].tolist() for name in NUMERIC),
+                             grc_out, labels.tolist(), arc_out, rules.tolist()))
+
+    old_grc = d["grc"]
+    changed = (labels != d["arc_label"]) | ((old_grc >= 0) & (grc != old_grc))
+    idx = np.flatnonzero(changed)
+    name = os.path.basename(src)
+    changes = [[name, t, lat, lon, alt, None if old < 0 else old, new, old_label, label, rule]
+               for t, lat, lon, alt, old, new, old_label, label, rule in zip(
+                   d["t_sec"][idx].tolist(), d["lat"][idx].tolist(), d["lon"][idx].tolist(),
+                   d["alt_m"][idx].tolist(), old_grc[idx].tolist(), grc[idx].tolist(),
+                   d["arc_label"][idx].tolist(), labels[idx].tolist(), rules[idx].tolist())]
+    return len(d["t_sec"]), changes
+
+
+def reclassify_many(paths, out_dir, workers=None, report=True):
+    """
+    reclassify_file over `paths` in a process pool (workers=None: one per
+    CPU, 1: in this process). Yields (path, rows, changed) in order as logs
+    finish and writes out_dir/reclassify_report.csv when report is True.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    report_file = None
+    if report:
+        report_file = open(os.path.join(out_dir, "reclassify_report.csv"), "w",
+                           newline="", encoding="utf-8")
+        report_writer = csv.writer(report_file)
+        report_writer.writerow(REPORT_HEADER)
+
+    pool = None if workers == 1 else ProcessPoolExecutor(max_workers=workers)
+    try:
+        if pool is None:
+            results = (reclassify_file(path, out_dir) for path in paths)
+        else:
+            results = pool.map(reclassify_file, paths, [out_dir] * len(paths))
+        for path, (rows, changes) in zip(paths, results):
+            if report_file:
+                report_writer.writerows(changes)
+            yield path, rows, len(changes)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        if report_file:
+            report_file.close()
@@ -0,0 +1,216 @@
+"""
+Per-flight risk-exposure summary, built in one pass with constant memory.
+
+    summary = RiskSummary()
+    summary.add(t_sec, arc_label, grc, rule, lat, lon)   # per sample, live or from a log
+    summary.write(summary_path(log_path))
+
+    python p2mi.py summary logs/flight_log_*.csv
+
+Samples are sample-and-hold: each one's ARC/GRC state lasts until the next
+sample, so uneven spacing is weighted by the real time between samples.
+Gaps longer than max_gap_s (a stalled loop or a lost link) only count
+max_gap_s towards the held state; the rest is reported as gap_s. A run of
+samples with the same ARC and GRC is one segment: its length goes into the
+dwell-time histograms and the top_segments riskiest segments are kept.
+"""
+import copy
+import heapq
+import json
+import os
+
+from flight_logger import ARC_LEVELS, log_stem, read_log
+from rate_scheduler import Histogram
+
+SUMMARY_SUFFIX = "_summary.json"
+
+# Dwell histogram bucket upper bounds in seconds (last bucket is open ended)
+DWELL_BUCKETS_S = (1, 2, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+UNKNOWN = "unknown"
+
+
+def summary_path(log_path):
+    """flight_log_X.csv / .csv.gz / .manifest.json -> flight_log_X_summary.json"""
+    return log_stem(log_path) + SUMMARY_SUFFIX
+
+
+def _dwell_dict(hist):
+    labels = [f"<={b}" for b in hist.bounds] + [f">{hist.bounds[-1]}"]
+    return {"count": hist.count, "mean_s": round(hist.mean(), 3), "max_s": round(hist.max, 3),
+            "buckets": {label: n for label, n in zip(labels, hist.counts) if n}}
+
+
+class RiskSummary:
+    """
+    Time-weighted exposure, transitions, dwell times and peak-risk segments
+    of one flight. max_gap_s: longest interval a sample is held for,
+    top_segments: number of peak-risk segments kept, source: the log the
+    samples were replayed from, if any.
+    """
+
+    def __init__(self, max_gap_s=5.0, top_segments=5, source=None):
+        if max_gap_s <= 0:
+            raise ValueError("max_gap_s must be positive.")
+        self.max_gap_s = max_gap_s
+        self.top_segments = top_segments
+        self.source = source
+
+        self.samples = 0
+        self.t_first = None
+        self.t_last = None
+        self.gap_s = 0.0
+        self.skipped = 0          # samples not after the previous one
+        self.max_arc = None
+        self.max_grc = None
+
+        self.arc_exposure = {}    # ARC label -> held seconds
+        self.grc_exposure = {}    # GRC class -> held seconds
+        self.arc_transitions = {}  # "ARC-b>ARC-c" -> count
+        self.grc_transitions = 0
+        self.arc_dwell = {}       # ARC label -> Histogram of segment lengths
+        self.grc_dwell = {}
+
+        self._state = None        # (arc_label, grc) of the last sample
+        self._segment = None
+        self._arc_run = None      # [arc_label, held seconds]
+        self._grc_run = None
+        self._peaks = []          # min-heap of (arc, grc, duration, n, segment)
+        self._n = 0
+
+    # --- Input ---
+    def add(self, t_sec, arc_label, grc, rule=None, lat=None, lon=None):
+        """One classified sample; t_sec must increase (others are counted in skipped)."""
+        if self.t_last is not None and t_sec <= self.t_last:
+            self.skipped += 1
+            return
+        if self.t_last is not None:
+            self._hold(t_sec - self.t_last)
+        arc_label = arc_label or UNKNOWN
+        grc = UNKNOWN if grc is None else grc
+        state = (arc_label, grc)
+
+        if self._state is None or state != self._state:
+            self._close_segment()
+            self._segment = {"t_start": t_sec, "t_end": t_sec, "duration_s": 0.0,
+                             "arc_label": arc_label, "grc": grc, "rule": rule,
+                             "lat": lat, "lon": lon}
+        if self._state is None or arc_label != self._state[0]:
+            if self._state is not None:
+                key = f"{self._state[0]}>{arc_label}"
+                self.arc_transitions[key] = self.arc_transitions.get(key, 0) + 1
+            self._close_run(self._arc_run, self.arc_dwell)
+            self._arc_run = [arc_label, 0.0]
+        if self._state is None or grc != self._state[1]:
+            if self._state is not None:
+                self.grc_transitions += 1
+            self._close_run(self._grc_run, self.grc_dwell)
+            self._grc_run = [grc, 0.0]
+        self._state = state
+
+        arc = ARC_LEVELS.get(arc_label)
+        if arc is not None:
+            self.max_arc = arc if self.max_arc is None else max(self.max_arc, arc)
+        if grc != UNKNOWN:
+            self.max_grc = grc if self.max_grc is None else max(self.max_grc, grc)
+        self.samples += 1
+        if self.t_first is None:
+            self.t_first = t_sec
+        self.t_last = t_sec
+
+    def _hold(self, dt):
+        """Charge the time since the last sample to its state."""
+        held = min(dt, self.max_gap_s)
+        self.gap_s += dt - held
+        arc_label, grc = self._state
+        self.arc_exposure[arc_label] = self.arc_exposure.get(arc_label, 0.0) + held
+        self.grc_exposure[grc] = self.grc_exposure.get(grc, 0.0) + held
+        self._arc_run[1] += held
+        self._grc_run[1] += held
+        self._segment["duration_s"] += held
+        self._segment["t_end"] = self.t_last + held
+
+    def _close_run(self, run, dwell):
+        if run is None:
+            return
+        key = str(run[0])
+        if key not in dwell:
+            dwell[key] = Histogram(DWELL_BUCKETS_S)
+        dwell[key].add(run[1])
+
+    def _close_segment(self):
+        seg = self._segment
+        if seg is None:
+            return
+        arc = ARC_LEVELS.get(seg["arc_label"], -1)
+        grc = seg["grc"] if seg["grc"] != UNKNOWN else -1
+        self._n += 1
+        entry = (arc, grc, seg["duration_s"], self._n, seg)
+        if len(self._peaks) < self.top_segments:
+            heapq.heappush(self._peaks, entry)
+        elif entry[:3] > self._peaks[0][:3]:
+            heapq.heapreplace(self._peaks, entry)
+        self._segment = None
+
+    # --- Output ---
+    def result(self):
+        """The summary as a JSON-ready dict; the open segment counts as ended."""
+        arc_dwell = dict(self.arc_dwell)
+        grc_dwell = dict(self.grc_dwell)
+        peaks = list(self._peaks)
+        # Fold the open runs into copies so add() can continue afterwards
+        for run, dwell in ((self._arc_run, arc_dwell), (self._grc_run, grc_dwell)):
+            if run is not None:
+                key = str(run[0])
+                dwell[key] = copy.deepcopy(dwell[key]) if key in dwell else Histogram(DWELL_BUCKETS_S)
+                dwell[key].add(run[1])
+        if self._segment is not None:
+            seg = self._segment
+            grc = seg["grc"] if seg["grc"] != UNKNOWN else -1
+            peaks.append((ARC_LEVELS.get(seg["arc_label"], -1), grc, seg["duration_s"], 0, seg))
+            peaks = heapq.nlargest(self.top_segments, peaks, key=lambda e: e[:3])
+
+        duration = (self.t_last - self.t_first) if self.samples else 0.0
+        covered = duration - self.gap_s
+        return {
+            "source": self.source,
+            "samples": self.samples,
+            "skipped": self.skipped,
+            "t_first": None if self.t_first is None else round(self.t_first, 3),
+            "t_last": None if self.t_last is None else round(self.t_last, 3),
+            "duration_s": round(duration, 3),
+            "gap_s": round(self.gap_s, 3),
+            "max_arc": self.max_arc,
+            "max_arc_label": next((k for k, v in ARC_LEVELS.items() if v == self.max_arc), None),
+            "max_grc": self.max_grc,
+            "arc_exposure_s": {k: round(v, 3) for k, v in sorted(self.arc_exposure.items())},
+            "arc_exposure_frac": {k: round(v / covered, 4) if covered > 0 else 0.0
+                                  for k, v in sorted(self.arc_exposure.items())},
+            "grc_exposure_s": {str(k): round(v, 3) for k, v in
+                               sorted(self.grc_exposure.items(), key=lambda kv: str(kv[0]))},
+            "arc_transitions": sum(self.arc_transitions.values()),
+            "arc_transition_counts": dict(sorted(self.arc_transitions.items())),
+            "grc_transitions": self.grc_transitions,
+            "arc_dwell": {k: _dwell_dict(v) for k, v in sorted(arc_dwell.items())},
+            "grc_dwell": {k: _dwell_dict(v) for k, v in sorted(grc_dwell.items())},
+            "peak_segments": [dict(seg, t_start=round(seg["t_start"], 3), t_end=round(seg["t_end"], 3),
+                                   duration_s=round(seg["duration_s"], 3))
+                              for *_, seg in sorted(peaks, key=lambda e: e[:3], reverse=True)],
+        }
+
+    def write(self, path):
+        """Write result() to `path` atomically; returns the path."""
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.result(), f, separators=(",", ":"))
+        os.replace(tmp, path)
+        return path
+
+
+def summarise_log(path, out_path=None, max_gap_s=5.0):
+    """Summarise a flight log into its sidecar (default summary_path(path)); returns (out, summary)."""
+    summary = RiskSummary(max_gap_s=max_gap_s)
+    for r in read_log(path):
+        summary.add(r["t_sec"], r["arc_label"], r["grc"], r["arc_rule"], r["lat"], r["lon"])
+    out = summary.write(out_path or summary_path(path))
+    return out, summary
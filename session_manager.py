@@ -0,0 +1,234 @@
+import selectors
+import struct
+import time
+from collections import namedtuple
+
+import xpc
+
+# Datarefs polled by default (same set as the monitoring loop in Tests.py)
+POSITION_DREFS = [
+    "sim/flightmodel/position/latitude",
+    "sim/flightmodel/position/longitude",
+    "sim/flightmodel/position/elevation",
+    "sim/flightmodel/position/psi",
+    "sim/flightmodel/position/groundspeed",
+]
+
+# One reading from one simulator: name of the session, monotonic receive time,
+# round-trip time in seconds and the first value of every requested dataref.
+Sample = namedtuple("Sample", ["sim", "t", "rtt", "values"])
+
+
+class SimSession:
+    """
+    One X-Plane instance polled by the SessionManager at its own rate.
+    """
+
+    def __init__(self, name, client, rate_hz, drefs, timeout):
+        self.name = name
+        self.client = client
+        self.period = 1.0 / rate_hz
+        self.drefs = list(drefs)
+        self.timeout = timeout
+
+        self.next_due = time.monotonic()
+        self.sent_at = None  # time of the request still waiting for a reply
+
+        # Counters
+        self.requests = 0
+        self.samples = 0
+        self.timeouts = 0
+        self.discarded = 0
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "samples": self.samples,
+            "timeouts": self.timeouts,
+            "discarded": self.discarded,
+        }
+
+
+class SessionManager:
+    """
+    Owns N XPlaneConnect connections and multiplexes them in a single thread.
+
+    Every session sends a GETD request when its period is due and the reply is
+    picked up by a selector, so no simulator ever blocks another. Each reply is
+    turned into a Sample and handed to every registered sink (classifier,
+    logger, ...). Sinks run on the manager thread and should return quickly.
+    """
+
+    def __init__(self, timeout=0.1):
+        self.timeout = timeout
+        self.selector = selectors.DefaultSelector()
+        self.sessions = {}
+        self.sinks = []
+        self._running = False
+
+    def add(self, name, xpHost, xpPort=49009, rate_hz=2, drefs=POSITION_DREFS):
+        """Open a connection to one simulator and poll it at rate_hz."""
+        if name in self.sessions:
+            raise ValueError(f"Session '{name}' already exists.")
+        if rate_hz <= 0:
+            raise ValueError("rate_hz must be positive.")
+
+        client = xpc.XPlaneConnect(xpHost=xpHost, xpPort=xpPort)
+        client.socket.setblocking(False)
+
+        session = SimSession(name, client, rate_hz, drefs, self.timeout)
+        self.sessions[name] = session
+        self.selector.register(client.socket, selectors.EVENT_READ, session)
+        return session
+
+    def remove(self, name):
+        session = self.sessions.pop(name)
+        self.selector.unregister(session.client.socket)
+        session.client.close()
+
+    def add_sink(self, sink):
+        """Register a callable receiving every Sample."""
+        self.sinks.append(sink)
+
+    # ---------- Event loop ----------
+
+    def _send_due(self, now):
+        for session in self.sessions.values():
+            # Reply overdue: give up on it and count a timeout. The next request
+            # waits one more timeout, so a late reply arrives while none is
+            # pending and is discarded instead of answering the next request.
+            if session.sent_at is not None and now - session.sent_at > session.timeout:
+                session.timeouts += 1
+                session.sent_at = None
+                session.next_due = max(session.next_due, now + session.timeout)
+
+            if session.sent_at is None and now >= session.next_due:
+                # GETD replies carry no request id: a late reply to an earlier
+                # request must not be taken for the answer to this one
+                session.discarded += session.client.drainUDP()
+                session.client.requestDREFs(session.drefs)
+                session.sent_at = now
+                session.requests += 1
+
+                # Absolute schedule, skipping periods that were missed entirely
+                session.next_due += session.period
+                if session.next_due < now:
+                    missed = int((now - session.next_due) / session.period) + 1
+                    session.next_due += missed * session.period
+
+    def _next_wakeup(self, now):
+        wakeups = []
+        for session in self.sessions.values():
+            if session.sent_at is not None:
+                wakeups.append(session.sent_at + session.timeout)
+            else:
+                wakeups.append(session.next_due)
+        if not wakeups:
+            return None
+        return max(0.0, min(wakeups) - now)
+
+    def _receive(self, session):
+        while True:
+            try:
+                buffer = session.client.socket.recv(16384)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                # e.g. ICMP port unreachable while the simulator is down
+                return
+
+            now = time.monotonic()
+            if session.sent_at is None:
+                # Reply to a request that already timed out
+                session.discarded += 1
+                continue
+
+            try:
+                result = session.client.parseDREFs(buffer)
+            except (ValueError, struct.error):
+                session.discarded += 1
+                continue
+            if len(result) != len(session.drefs):
+                session.discarded += 1
+                continue
+
+            sample = Sample(session.name, now, now - session.sent_at,
+                            [row[0] if row else float("nan") for row in result])
+            session.sent_at = None
+            session.samples += 1
+            for sink in self.sinks:
+                sink(sample)
+
+    def poll(self, max_wait=None):
+        """Run one iteration: send due requests, then wait for replies."""
+        now = time.monotonic()
+        self._send_due(now)
+
+        wait = self._next_wakeup(time.monotonic())
+        if max_wait is not None:
+            wait = max_wait if wait is None else min(wait, max_wait)
+
+        for key, _ in self.selector.select(wait):
+            self._receive(key.data)
+
+    def run(self, duration=None):
+        """
+        Poll every session until stop() is called or duration (s) elapses.
+        Without a duration, returns as soon as there is no session left.
+        """
+        self._running = True
+        end = None if duration is None else time.monotonic() + duration
+        while self._running:
+            if end is None and not self.sessions:
+                break  # nothing would ever wake the selector
+            if end is not None:
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.poll(max_wait=remaining)
+            else:
+                self.poll()
+
+    def stop(self):
+        self._running = False
+
+    def stats(self):
+        return {name: s.stats() for name, s in self.sessions.items()}
+
+    def close(self):
+        for name in list(self.sessions):
+            self.remove(name)
+        self.selector.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+
+# ========================================================================
+# Example: python session_manager.py 192.168.10.2:49009@2 192.168.10.3@5
+if __name__ == "__main__":
+    import sys
+    import arc_classifier
+    import grc_classifier
+
+    def classify(sample):
+        lat, lon, alt, hdg, spd = sample.values
+        grc = grc_classifier.final_grc(lat, lon)
+        _, arc_label, _, reason = arc_classifier.air_risk(lat, lon, alt, grc)
+        print(f"[{sample.sim}] {lat:.6f}, {lon:.6f}, {alt:.1f} m, grc={grc}, "
+              f"{arc_label} ({reason['rule']}) rtt={sample.rtt * 1000:.1f} ms")
+
+    with SessionManager() as manager:
+        for i, arg in enumerate(sys.argv[1:]):
+            address, _, rate = arg.partition("@")
+            host, _, port = address.partition(":")
+            manager.add(f"sim{i}", host, int(port or 49009), float(rate or 2))
+        manager.add_sink(classify)
+        try:
+            manager.run()
+        except KeyboardInterrupt:
+            print("\nStopped by user.")
+        print(manager.stats())
@@ -0,0 +1,261 @@
+"""
+Headless web dashboard: ARC/GRC history, rule text and position pushed to
+browsers over Server-Sent Events.
+
+    web = WebDashboard(port=8080)
+    web.start()
+    web.update(t_now, arc, grc, reason_text, arc_label, lat, lon, alt)  # per sample
+
+Samples go into ring buffers like plotting.py's. A publisher thread turns
+the buffers into one downsampled JSON message at most max_hz times a
+second; every client has a one-message mailbox that the publisher
+overwrites, and its own server thread writes the newest message to the
+socket. The producer only appends to the buffers, a slow client only ever
+skips frames, and a client costs one mailbox no matter how far behind it
+is.
+"""
+import json
+import math
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>P2MI dashboard</title>
+<style>
+body { font-family: sans-serif; margin: 1em; background: #f4f4f4; }
+.grid { display: grid; grid-template-columns: 1fr 1fr; gap: 1em; }
+.panel { background: #fff; padding: .8em; border-radius: 4px; }
+svg { width: 100%; height: 160px; background: #e5e5e5; }
+.level { font-size: 1.4em; font-weight: bold; text-align: center; }
+#status { color: #888; }
+</style></head><body>
+<h2>P2MI SORA risk monitor <span id="status">connecting...</span></h2>
+<div class="grid">
+ <div class="panel"><b>ARC Plot</b><svg id="arc" viewBox="0 0 400 100" preserveAspectRatio="none">
+  <polyline fill="none" stroke-width="2" vector-effect="non-scaling-stroke"/></svg></div>
+ <div class="panel"><b>GRC Plot</b><svg id="grc" viewBox="0 0 400 100" preserveAspectRatio="none">
+  <polyline fill="none" stroke-width="2" vector-effect="non-scaling-stroke"/></svg></div>
+ <div class="panel">Reason:<br><span id="rule"></span></div>
+ <div class="panel">Position:<br><span id="pos"></span></div>
+ <div class="panel level" id="arc_level"></div>
+ <div class="panel level" id="grc_level"></div>
+</div>
+<script>
+function color(level) {
+  if (level === null) return "black";
+  if (level <= 1) return "green";
+  if (level == 2) return "gold";
+  if (level == 3) return "orange";
+  return "red";
+}
+function plot(id, t, y, ymax, level) {
+  var line = document.querySelector("#" + id + " polyline");
+  if (t.length < 2) return;
+  var t0 = t[0], span = Math.max(t[t.length - 1] - t0, 1e-6), pts = [];
+  for (var i = 0; i < t.length; i++)
+    if (y[i] !== null) pts.push(((t[i] - t0) / span * 400).toFixed(1) + "," + (100 - y[i] / ymax * 100).toFixed(1));
+  line.setAttribute("points", pts.join(" "));
+  line.setAttribute("stroke", color(level));
+}
+var source = new EventSource("/events");
+source.onopen = function () { document.getElementById("status").textContent = ""; };
+source.onerror = function () { document.getElementById("status").textContent = "reconnecting..."; };
+source.onmessage = function (e) {
+  var d = JSON.parse(e.data);
+  plot("arc", d.t, d.arc, 5, d.arc_now);
+  plot("grc", d.t, d.grc, 10, d.grc_now);
+  document.getElementById("rule").textContent = d.rule;
+  document.getElementById("pos").textContent = d.lat === null || d.lon === null || d.alt === null ? "-" :
+    d.lat.toFixed(6) + ", " + d.lon.toFixed(6) + ", " + d.alt.toFixed(1) + " m";
+  var a = document.getElementById("arc_level"), g = document.getElementById("grc_level");
+  a.textContent = "Current ARC Level = " + d.arc_label; a.style.color = color(d.arc_now);
+  g.textContent = "Current GRC Level = " + d.grc_now; g.style.color = color(d.grc_now);
+};
+</script></body></html>
+"""
+
+
+def _finite(value):
+    """value, or None for a NaN or infinite float."""
+    return None if isinstance(value, float) and not math.isfinite(value) else value
+
+
+class _Mailbox:
+    """Holds only the newest message for one client."""
+
+    def __init__(self):
+        self._cv = threading.Condition()
+        self._message = None
+        self.closed = False
+
+    def put(self, message):
+        with self._cv:
+            self._message = message
+            self._cv.notify()
+
+    def get(self, timeout):
+        """Newest message, or None after `timeout` seconds without one."""
+        with self._cv:
+            if self._message is None and not self.closed:
+                self._cv.wait(timeout)
+            message, self._message = self._message, None
+            return message
+
+    def close(self):
+        with self._cv:
+            self.closed = True
+            self._cv.notify()
+
+
+class WebDashboard:
+    """
+    ARC/GRC ring buffers served to browsers. max_points is the number of
+    samples per series sent to the clients, max_hz the message rate and
+    max_clients the number of concurrent event streams.
+    """
+
+    def __init__(self, host="127.0.0.1", port=8080, max_samples=600, max_points=150,
+                 max_hz=5, max_clients=32, keepalive_s=15):
+        self.host = host
+        self.port = port
+        self.max_points = max_points
+        self.max_hz = max_hz
+        self.max_clients = max_clients
+        self.keepalive_s = keepalive_s
+
+        self.times = deque(maxlen=max_samples)
+        self.arc_history = deque(maxlen=max_samples)
+        self.grc_history = deque(maxlen=max_samples)
+        self.latest = {}
+        self._lock = threading.Lock()
+        self._version = 0
+
+        self._clients = set()
+        self._clients_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._message = None
+        self._server = None
+
+        # Counters
+        self.messages = 0
+        self.rejected = 0
+
+    def update(self, t_now, arc, grc, reason_text, arc_label, lat=None, lon=None, alt=None):
+        with self._lock:
+            self.times.append(t_now)
+            self.arc_history.append(arc)
+            self.grc_history.append(grc)
+            self.latest = {"arc_now": arc, "grc_now": grc, "rule": reason_text,
+                           "arc_label": arc_label, "lat": lat, "lon": lon, "alt": alt}
+            self._version += 1
+
+    def _snapshot(self):
+        """Downsampled series plus the latest state, serialised once for all clients."""
+        with self._lock:
+            n = len(self.times)
+            step = max(1, -(-n // self.max_points))
+            # Start so that the newest sample is always included
+            window = slice((n - 1) % step if n else 0, None, step)
+            data = dict(self.latest, t=list(self.times)[window],
+                        arc=list(self.arc_history)[window], grc=list(self.grc_history)[window])
+        # JSON has no NaN/Infinity: a lost position or an unknown class is null
+        data = {key: [_finite(v) for v in value] if isinstance(value, list) else _finite(value)
+                for key, value in data.items()}
+        return f"data: {json.dumps(data, allow_nan=False)}\n\n".encode()
+
+    def _publish(self):
+        version = 0
+        while not self._stop.wait(1.0 / self.max_hz):
+            if self._version == version:
+                continue
+            version = self._version
+            self._message = self._snapshot()
+            self.messages += 1
+            with self._clients_lock:
+                clients = list(self._clients)
+            for mailbox in clients:
+                mailbox.put(self._message)
+
+    def clients(self):
+        with self._clients_lock:
+            return len(self._clients)
+
+    # --- Server ---
+    def _stream(self, handler):
+        mailbox = _Mailbox()
+        with self._clients_lock:
+            full = len(self._clients) >= self.max_clients
+            if not full:
+                self._clients.add(mailbox)
+        if full:
+            self.rejected += 1
+            handler.send_error(503, "too many dashboard clients")
+            return
+        try:
+            handler.send_response(200)
+            handler.send_header("Content-Type", "text/event-stream")
+            handler.send_header("Cache-Control", "no-cache")
+            handler.end_headers()
+            # A new client gets the current state immediately
+            message = self._message
+            while not self._stop.is_set():
+                handler.wfile.write(message or b": keepalive\n\n")
+                handler.wfile.flush()
+                message = mailbox.get(self.keepalive_s)
+                if mailbox.closed:
+                    break
+        except OSError:
+            # Disconnected, or stuck longer than the socket timeout
+            pass
+        finally:
+            with self._clients_lock:
+                self._clients.discard(mailbox)
+
+    def start(self):
+        dashboard = self
+
+        class Handler(BaseHTTPRequestHandler):
+            timeout = 60
+
+            def do_GET(self):
+                if self.path == "/events":
+                    dashboard._stream(self)
+                    return
+                if self.path not in ("/", "/index.html"):
+                    self.send_error(404)
+                    return
+                data = PAGE.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="web-dashboard",
+                         daemon=True).start()
+        threading.Thread(target=self._publish, name="web-publisher", daemon=True).start()
+        print(f"Web dashboard: http://{self.host}:{self.port}/")
+
+    def stop(self):
+        self._stop.set()
+        with self._clients_lock:
+            for mailbox in self._clients:
+                mailbox.close()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.stop()
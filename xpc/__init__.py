@@ -1,12 +1,17 @@
 import socket
 import struct
+import time
+
+# Largest UDP payload that fits a 1500 byte Ethernet frame without IP fragmentation
+MAX_DATAGRAM = 1472
 
 class XPlaneConnect(object):
     """XPlaneConnect (XPC) facilitates communication to and from the XPCPlugin."""
     socket = None
 
     # Basic Functions
-    def __init__(self, xpHost='localhost', xpPort=49009, port=0, timeout=100):
+    def __init__(self, xpHost='localhost', xpPort=49009, port=0, timeout=100,
+                 retries=0, adaptiveTimeout=False, minTimeout=5):
         """Sets up a new connection to an X-Plane Connect plugin running in X-Plane.
 
             Args:
@@ -14,6 +19,11 @@ class XPlaneConnect(object):
               xpPort: The port on which the XPC plugin is listening. Usually 49007.
               port: The port which will be used to send and receive data.
               timeout: The period (in milliseconds) after which read attempts will fail.
+                With `adaptiveTimeout` this is the upper bound of each attempt.
+              retries: How many times a request is re-sent after its reply timed out.
+              adaptiveTimeout: Derive the per-attempt timeout from the measured round-trip
+                times (smoothed RTT + 4 * RTT deviation) instead of always using `timeout`.
+              minTimeout: The lower bound (in milliseconds) of the adaptive timeout.
         """
 
         # Validate parameters
@@ -29,6 +39,10 @@ class XPlaneConnect(object):
             raise ValueError("The specified port is not a valid port number.")
         if timeout < 0:
             raise ValueError("timeout must be non-negative.")
+        if retries < 0:
+            raise ValueError("retries must be non-negative.")
+        if adaptiveTimeout and (minTimeout < 0 or minTimeout > timeout):
+            raise ValueError("minTimeout must be between 0 and timeout.")
 
         # Setup XPlane IP and port
         self.xpDst = (xpIP, xpPort)
@@ -40,6 +54,16 @@ class XPlaneConnect(object):
         timeout /= 1000.0
         self.socket.settimeout(timeout)
 
+        # Request/response bookkeeping
+        self.timeout = timeout
+        self.retries = retries
+        self.adaptiveTimeout = adaptiveTimeout
+        self.minTimeout = min(minTimeout / 1000.0, timeout)
+        self.srtt = None
+        self.rttvar = None
+        self.backoff = 1
+        self.stats = {"requests": 0, "timeouts": 0, "retries": 0, "discarded": 0}
+
     def __del__(self):
         self.close()
 
@@ -68,6 +92,105 @@ class XPlaneConnect(object):
         """Reads a message from the underlying UDP socket."""
         return self.socket.recv(16384)
 
+    def drainUDP(self):
+        """Discards every datagram already waiting on the socket, e.g. late replies to
+           earlier requests. Returns the number of datagrams discarded.
+        """
+        count = 0
+        timeout = self.socket.gettimeout()
+        self.socket.setblocking(False)
+        try:
+            while True:
+                self.socket.recv(16384)
+                count += 1
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError:
+            # e.g. a pending ICMP error from an earlier send
+            pass
+        finally:
+            self.socket.settimeout(timeout)
+        self.stats["discarded"] += count
+        return count
+
+    def currentTimeout(self):
+        """Returns the timeout (in seconds) the next request attempt will use."""
+        if not self.adaptiveTimeout or self.srtt is None:
+            return self.timeout
+        rto = (self.srtt + 4 * self.rttvar) * self.backoff
+        return min(self.timeout, max(self.minTimeout, rto))
+
+    def getStats(self):
+        """Returns the request counters and the round-trip time estimate (in milliseconds)."""
+        stats = dict(self.stats)
+        stats["srtt_ms"] = None if self.srtt is None else self.srtt * 1000.0
+        stats["rttvar_ms"] = None if self.rttvar is None else self.rttvar * 1000.0
+        stats["timeout_ms"] = self.currentTimeout() * 1000.0
+        return stats
+
+    def _updateRTT(self, rtt):
+        # Jacobson/Karels estimator, as used for the TCP retransmission timeout
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2.0
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+        self.backoff = 1
+
+    def request(self, buffer, parse):
+        """Sends a request and waits for a matching response.
+
+            Stale datagrams are drained before sending. Responses that `parse` rejects with a
+            ValueError (wrong header, length or aircraft) are discarded while waiting. If no
+            matching response arrives in time, the request is re-sent up to `retries` times.
+
+            Args:
+              buffer: The request message.
+              parse: Called with each received datagram; returns the parsed result or raises
+                ValueError if the datagram is not the response to this request.
+
+            Returns: The result of `parse` for the matching response.
+        """
+        self.stats["requests"] += 1
+        timeout = self.socket.gettimeout()
+        try:
+            for attempt in range(self.retries + 1):
+                if attempt > 0:
+                    self.stats["retries"] += 1
+                self.drainUDP()
+                self.sendUDP(buffer)
+
+                sent = time.perf_counter()
+                deadline = sent + self.currentTimeout()
+                while True:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self.socket.settimeout(remaining)
+                    try:
+                        resultBuf = self.socket.recv(16384)
+                    except socket.timeout:
+                        break
+                    try:
+                        result = parse(resultBuf)
+                    except (ValueError, struct.error):
+                        self.stats["discarded"] += 1
+                        continue
+
+                    # Karn's rule: only sample replies that cannot belong to a retry
+                    if attempt == 0:
+                        self._updateRTT(time.perf_counter() - sent)
+                    return result
+
+                self.stats["timeouts"] += 1
+                if self.adaptiveTimeout:
+                    self.backoff = min(self.backoff * 2, 64)
+        finally:
+            self.socket.settimeout(timeout)
+
+        raise socket.timeout("No response after {0:d} attempt(s).".format(self.retries + 1))
+
     # Configuration
     def setCONN(self, port):
         """Sets the port on which the client sends and receives data.
@@ -151,24 +274,107 @@ class XPlaneConnect(object):
         Args:
           ac: The aircraft to get the position of. 0 is the main/player aircraft.
         """
-        # Send request
+        def parse(resultBuf):
+            result = self._parsePOSI(resultBuf)
+            if result[1] != ac:
+                raise ValueError("Response for another aircraft.")
+            return result
+
+        # Send request and read response
         buffer = struct.pack(b"<4sxB", b"GETP", ac)
-        self.sendUDP(buffer)
+        result = self.request(buffer, parse)
+
+        # Drop the header & ac from the return value
+        return result[2:]
+
+    def getPOSIs(self, acs=range(20)):
+        """Gets position information for several aircraft in one batch.
 
-        # Read response
-        resultBuf = self.readUDP()
-        if len(resultBuf) == 34:
-            result = struct.unpack(b"<4sxBfffffff", resultBuf)
-        elif len(resultBuf) == 46:
-            result = struct.unpack(b"<4sxBdddffff", resultBuf)
+            The GETP requests for all aircraft are sent back to back before any response is
+            read, so the batch costs about one round trip instead of one per aircraft.
+            Responses are matched to aircraft by the aircraft number in their header.
+
+            Args:
+              acs: The aircraft to get the positions of. 0 is the main/player aircraft.
+
+            Returns: A NumPy array of shape (len(acs), 7) holding one `getPOSI` result per
+              aircraft, in the order given by `acs`. Rows of aircraft that did not respond
+              before the timeout (after all retries) are filled with NaN.
+        """
+        import numpy as np
+
+        acs = list(acs)
+        for ac in acs:
+            if ac < 0 or ac > 20:
+                raise ValueError("Aircraft number must be between 0 and 20.")
+
+        result = np.full((len(acs), 7), np.nan)
+        rows = {}
+        for i, ac in enumerate(acs):
+            rows.setdefault(ac, []).append(i)
+
+        # Send all requests first, then collect the responses. Aircraft still missing when
+        # the replies dry up are requested again, up to `retries` times.
+        self.stats["requests"] += 1
+        self.drainUDP()
+        pending = set(rows)
+        timeout = self.socket.gettimeout()
+        try:
+            for attempt in range(self.retries + 1):
+                if attempt > 0:
+                    self.stats["retries"] += 1
+                for ac in sorted(pending):
+                    self.sendUDP(struct.pack(b"<4sxB", b"GETP", ac))
+
+                sent = time.perf_counter()
+                deadline = sent + self.currentTimeout()
+                while pending:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self.socket.settimeout(remaining)
+                    try:
+                        resultBuf = self.socket.recv(16384)
+                    except socket.timeout:
+                        break
+                    try:
+                        posi = self._parsePOSI(resultBuf)
+                    except (ValueError, struct.error):
+                        self.stats["discarded"] += 1
+                        continue
+                    ac = posi[1]
+                    if ac not in pending:
+                        self.stats["discarded"] += 1
+                        continue
+                    if attempt == 0 and len(pending) == len(rows):
+                        self._updateRTT(time.perf_counter() - sent)
+                    result[rows[ac]] = posi[2:]
+                    pending.discard(ac)
+
+                    # Replies are still flowing: extend the wait for the rest of the batch
+                    deadline = time.perf_counter() + self.currentTimeout()
+
+                if not pending:
+                    break
+                self.stats["timeouts"] += 1
+        finally:
+            self.socket.settimeout(timeout)
+
+        return result
+
+    @staticmethod
+    def _parsePOSI(buffer):
+        """Unpacks a POSI response, including the header and aircraft number."""
+        if len(buffer) == 34:
+            result = struct.unpack(b"<4sxBfffffff", buffer)
+        elif len(buffer) == 46:
+            result = struct.unpack(b"<4sxBdddffff", buffer)
         else:
             raise ValueError("Unexpected response length.")
 
         if result[0] != b"POSI":
-            raise ValueError("Unexpected header: " + result[0])
-
-        # Drop the header & ac from the return value
-        return result[2:]
+            raise ValueError("Unexpected header: " + repr(result[0]))
+        return result
 
     def sendPOSI(self, values, ac=0):
         """Sets position information on the specified aircraft.
@@ -214,18 +420,20 @@ class XPlaneConnect(object):
         Args:
           ac: The aircraft to get the control surfaces of. 0 is the main/player aircraft.
         """
-        # Send request
+        def parse(resultBuf):
+            if len(resultBuf) != 31:
+                raise ValueError("Unexpected response length.")
+
+            result = struct.unpack(b"<4sxffffbfBf", resultBuf)
+            if result[0] != b"CTRL":
+                raise ValueError("Unexpected header: " + repr(result[0]))
+            if result[7] != ac:
+                raise ValueError("Response for another aircraft.")
+            return result
+
+        # Send request and read response
         buffer = struct.pack(b"<4sxB", b"GETC", ac)
-        self.sendUDP(buffer)
-
-        # Read response
-        resultBuf = self.readUDP()
-        if len(resultBuf) != 31:
-            raise ValueError("Unexpected response length.")
-
-        result = struct.unpack(b"<4sxffffbfBf", resultBuf)
-        if result[0] != b"CTRL":
-            raise ValueError("Unexpected header: " + result[0])
+        result = self.request(buffer, parse)
 
         # Drop the header from the return value
         result =result[1:7] + result[8:]
@@ -310,7 +518,7 @@ class XPlaneConnect(object):
                 if len(value) > 255:
                     raise ValueError("value must have less than 256 items.")
                 fmt = "<B{0:d}sB{1:d}f".format(len(dref), len(value))
-                buffer += struct.pack(fmt.encode(), len(dref), dref.encode(), len(value), value)
+                buffer += struct.pack(fmt.encode(), len(dref), dref.encode(), len(value), *value)
             else:
                 fmt = "<B{0:d}sBf".format(len(dref))
                 buffer += struct.pack(fmt.encode(), len(dref), dref.encode(), 1, value)
@@ -318,6 +526,64 @@ class XPlaneConnect(object):
         # Send
         self.sendUDP(buffer)
 
+    def sendDREFsBulk(self, drefs, values, maxDatagram=MAX_DATAGRAM):
+        """Sets any number of datarefs, split over as many DREF messages as needed.
+
+            All values are converted to float32 in one pass and sliced per dataref, and
+            datarefs are packed greedily into messages of at most `maxDatagram` bytes.
+
+            Args:
+              drefs: A list of names of the datarefs to set.
+              values: One scalar or sequence per dataref, or a 2D NumPy array with one row per
+                dataref.
+              maxDatagram: The largest message to send, in bytes. A single dataref that does
+                not fit is still sent in a message of its own.
+
+            Returns: A tuple (bytes sent, messages sent).
+        """
+        import numpy as np
+
+        if len(drefs) != len(values):
+            raise ValueError("drefs and values must have the same number of elements.")
+        if len(drefs) == 0:
+            return 0, 0
+
+        # Convert every value to little endian float32 at once
+        rows = [np.ravel(np.asarray(value, dtype="<f4")) for value in values]
+        counts = [len(row) for row in rows]
+
+        # Validate everything first, so a bad entry never leaves the datarefs half set
+        names = [dref.encode() for dref in drefs]
+        for name, count in zip(names, counts):
+            if len(name) == 0 or len(name) > 255:
+                raise ValueError("dref must be a non-empty string less than 256 characters.")
+            if count == 0 or count > 255:
+                raise ValueError("value must have between 1 and 255 items.")
+        raw = memoryview(np.concatenate(rows).tobytes())
+
+        header = struct.pack(b"<4sx", b"DREF")
+        buffer = bytearray(header)
+        sent = 0
+        messages = 0
+        offset = 0
+        for name, count in zip(names, counts):
+            entry = struct.pack(b"B", len(name)) + name + struct.pack(b"B", count)
+            size = len(entry) + 4 * count
+            if len(buffer) > len(header) and len(buffer) + size > maxDatagram:
+                self.sendUDP(bytes(buffer))
+                sent += len(buffer)
+                messages += 1
+                buffer = bytearray(header)
+
+            buffer += entry
+            buffer += raw[offset:offset + 4 * count]
+            offset += 4 * count
+
+        self.sendUDP(bytes(buffer))
+        sent += len(buffer)
+        messages += 1
+        return sent, messages
+
     def getDREF(self, dref):
         """Gets the value of an X-Plane dataref.
 
@@ -337,15 +603,46 @@ class XPlaneConnect(object):
             Returns: A multidimensional sequence of data representing the values of the requested
              datarefs.
         """
-        # Send request
+        def parse(resultBuf):
+            result = self.parseDREFs(resultBuf)
+            if len(result) != len(drefs):
+                raise ValueError("Response for another request.")
+            return result
+
+        # Send request and read response
+        return self.request(self.packDREFs(drefs), parse)
+
+    def requestDREFs(self, drefs):
+        """Sends a GETD request for one or more datarefs without waiting for the response.
+
+            The response can be read later with `readUDP` and unpacked with `parseDREFs`.
+
+            Args:
+              drefs: The names of the datarefs to get.
+        """
+        self.sendUDP(self.packDREFs(drefs))
+
+    @staticmethod
+    def packDREFs(drefs):
+        """Builds the GETD request for one or more datarefs."""
         buffer = struct.pack(b"<4sxB", b"GETD", len(drefs))
         for dref in drefs:
             fmt = "<B{0:d}s".format(len(dref))
             buffer += struct.pack(fmt.encode(), len(dref), dref.encode())
-        self.sendUDP(buffer)
+        return buffer
 
-        # Read and parse response
-        buffer = self.readUDP()
+    @staticmethod
+    def parseDREFs(buffer):
+        """Unpacks the response to a GETD request.
+
+            Args:
+              buffer: The raw datagram received from the plugin.
+
+            Returns: A multidimensional sequence of data representing the values of the requested
+             datarefs.
+        """
+        if len(buffer) < 6 or buffer[:4] != b"RESP":
+            raise ValueError("Unexpected header: " + repr(buffer[:4]))
         resultCount = struct.unpack_from(b"B", buffer, 5)[0]
         offset = 6
         result = []
@@ -422,9 +719,50 @@ class XPlaneConnect(object):
         if op == 3:
             buffer = struct.pack(b"<4sxBB", b"WYPT", 3, 0)
         else:
-            buffer = struct.pack(("<4sxBB" + str(len(points)) + "f").encode(), b"WYPT", op, len(points), *points)
+            buffer = struct.pack(("<4sxBB" + str(len(points)) + "f").encode(), b"WYPT", op, len(points) // 3, *points)
         self.sendUDP(buffer)
 
+    def sendWYPTBulk(self, op, points, maxDatagram=MAX_DATAGRAM):
+        """Adds or removes any number of waypoints, split over as many WYPT messages as needed.
+
+            Args:
+              op: The operation to perform. Pass `1` to add waypoints,
+                `2` to remove waypoints, and `3` to clear all waypoints.
+              points: A NumPy array (or anything convertible to one) of latitude, longitude,
+                altitude triples, either flat or of shape (N, 3).
+              maxDatagram: The largest message to send, in bytes. Each message also carries
+                at most 255 points.
+
+            Returns: A tuple (bytes sent, messages sent).
+        """
+        import numpy as np
+
+        if op < 1 or op > 3:
+            raise ValueError("Invalid operation specified.")
+        if op == 3:
+            buffer = struct.pack(b"<4sxBB", b"WYPT", 3, 0)
+            self.sendUDP(buffer)
+            return len(buffer), 1
+
+        points = np.asarray(points, dtype="<f4")
+        if points.size % 3 != 0:
+            raise ValueError("Invalid points. Points should be divisible by 3.")
+        points = points.reshape(-1, 3)
+
+        perMessage = min(255, (maxDatagram - 7) // 12)
+        if perMessage < 1:
+            raise ValueError("maxDatagram is too small for a single waypoint.")
+
+        sent = 0
+        count = 0
+        for start in range(0, len(points), perMessage):
+            chunk = points[start:start + perMessage]
+            buffer = struct.pack(b"<4sxBB", b"WYPT", op, len(chunk)) + chunk.tobytes()
+            self.sendUDP(buffer)
+            sent += len(buffer)
+            count += 1
+        return sent, count
+
 
 class ViewType(object):
     Forwards = 73
@@ -0,0 +1,354 @@
+import bisect
+import csv
+import heapq
+import math
+import random
+import socket
+import struct
+import threading
+import time
+
+# Datarefs served from the trajectory, in the columns of the flight logs
+TRAJECTORY_DREFS = {
+    "sim/flightmodel/position/latitude": "lat",
+    "sim/flightmodel/position/longitude": "lon",
+    "sim/flightmodel/position/elevation": "alt",
+    "sim/flightmodel/position/psi": "hdg",
+    "sim/flightmodel/position/groundspeed": "spd",
+}
+
+FIELDS = ("lat", "lon", "alt", "hdg", "spd")
+
+
+# ---------- Trajectory ----------
+
+class Trajectory:
+    """
+    Time-indexed ownship states (lat, lon, alt, hdg, spd) with linear
+    interpolation. Playback loops once the last sample is reached.
+    """
+
+    def __init__(self, times, states):
+        if not times:
+            raise ValueError("Trajectory needs at least one sample.")
+        self.times = list(times)
+        self.states = [tuple(s) for s in states]
+        self.duration = self.times[-1] - self.times[0]
+
+    @classmethod
+    def from_csv(cls, path):
+        """Load a logs/flight_log_*.csv file (old and new schemas)."""
+        times, states = [], []
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                times.append(float(row["t_sec"]))
+                states.append((float(row["lat"]), float(row["lon"]), float(row["alt_m"]),
+                               float(row["hdg_deg"]), float(row["spd_mps"])))
+        return cls(times, states)
+
+    @classmethod
+    def circle(cls, lat=-6.2664, lon=106.8911, alt=300.0, radius_m=3000.0,
+               speed_mps=60.0, step=0.5):
+        """Scripted orbit around a point (default: Halim)."""
+        period = 2 * math.pi * radius_m / speed_mps
+        times, states = [], []
+        t = 0.0
+        while t <= period:
+            a = 2 * math.pi * t / period
+            dlat = radius_m * math.cos(a) / 111320.0
+            dlon = radius_m * math.sin(a) / (111320.0 * math.cos(math.radians(lat)))
+            hdg = (math.degrees(a) + 90.0) % 360.0
+            times.append(t)
+            states.append((lat + dlat, lon + dlon, alt, hdg, speed_mps))
+            t += step
+        return cls(times, states)
+
+    def state_at(self, t):
+        if self.duration > 0:
+            t = self.times[0] + (t % self.duration)
+        else:
+            return self.states[0]
+
+        i = bisect.bisect_right(self.times, t)
+        if i <= 0:
+            return self.states[0]
+        if i >= len(self.times):
+            return self.states[-1]
+
+        t0, t1 = self.times[i - 1], self.times[i]
+        s0, s1 = self.states[i - 1], self.states[i]
+        f = (t - t0) / (t1 - t0) if t1 > t0 else 0.0
+        return tuple(a + (b - a) * f for a, b in zip(s0, s1))
+
+
+# ---------- Emulator ----------
+
+class XPCEmulator:
+    """
+    Local UDP server speaking the XPC plugin protocol.
+
+    Handles CONN, GETD, GETP, GETC, DREF, POSI, CTRL, DATA, WYPT, SIMU, TEXT
+    and VIEW. Ownship follows the trajectory; AI aircraft (1..traffic) follow
+    the same trajectory delayed by `traffic_spacing` seconds each. Replies are
+    delayed by latency + uniform(0, jitter) ms and dropped with probability
+    `loss`.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, trajectory=None, latency_ms=0.0,
+                 jitter_ms=0.0, loss=0.0, traffic=19, traffic_spacing=10.0, seed=None):
+        self.trajectory = trajectory or Trajectory.circle()
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.loss = loss
+        self.traffic = traffic
+        self.traffic_spacing = traffic_spacing
+        self.random = random.Random(seed)
+
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self.socket.bind((host, port))
+        self.address = self.socket.getsockname()
+
+        # Simulator state written by the client
+        self.drefs = {}
+        self.posi = {}
+        self.ctrl = {}
+        self.data = {}
+        self.waypoints = []
+        self.paused = 0
+        self.text = ""
+        self.view = None
+        self.reply_port = None
+
+        # Counters
+        self.received = 0
+        self.replied = 0
+        self.dropped = 0
+
+        self._outbox = []
+        self._outbox_cv = threading.Condition()
+        self._running = False
+        self._threads = []
+        self._t0 = time.monotonic()
+
+    # ---------- Lifecycle ----------
+
+    def start(self):
+        self._running = True
+        self._t0 = time.monotonic()
+        self.socket.settimeout(0.1)
+        for target in (self._receive_loop, self._send_loop):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self._running = False
+        with self._outbox_cv:
+            self._outbox_cv.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self.socket.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, type, value, traceback):
+        self.stop()
+
+    # ---------- State ----------
+
+    def sim_time(self):
+        return time.monotonic() - self._t0
+
+    def aircraft_state(self, ac):
+        t = self.sim_time() - ac * self.traffic_spacing
+        return self.trajectory.state_at(t)
+
+    def dref_values(self, name):
+        field = TRAJECTORY_DREFS.get(name)
+        if field is not None:
+            return [self.aircraft_state(0)[FIELDS.index(field)]]
+        return self.drefs.get(name, [0.0])
+
+    # ---------- Networking ----------
+
+    def _receive_loop(self):
+        while self._running:
+            try:
+                buffer, addr = self.socket.recvfrom(65536)
+            except socket.timeout:
+                continue
+            except OSError:
+                if not self._running:
+                    return
+                continue
+            self.received += 1
+            try:
+                reply = self.handle(buffer)
+            except (struct.error, ValueError, IndexError):
+                continue
+            if reply is None:
+                continue
+
+            if self.reply_port is not None:
+                addr = (addr[0], self.reply_port)
+            self._schedule(reply, addr)
+
+    def _schedule(self, reply, addr):
+        if self.loss and self.random.random() < self.loss:
+            self.dropped += 1
+            return
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay <= 0:
+            self._sendto(reply, addr)
+            return
+        with self._outbox_cv:
+            heapq.heappush(self._outbox, (time.monotonic() + delay, id(reply), reply, addr))
+            self._outbox_cv.notify()
+
+    def _send_loop(self):
+        while self._running:
+            with self._outbox_cv:
+                if not self._outbox:
+                    self._outbox_cv.wait(0.1)
+                    continue
+                due = self._outbox[0][0] - time.monotonic()
+                if due > 0:
+                    self._outbox_cv.wait(due)
+                    continue
+                _, _, reply, addr = heapq.heappop(self._outbox)
+            self._sendto(reply, addr)
+
+    def _sendto(self, reply, addr):
+        try:
+            self.socket.sendto(reply, addr)
+            self.replied += 1
+        except OSError:
+            pass
+
+    # ---------- Protocol ----------
+
+    def handle(self, buffer):
+        """Apply one datagram to the simulator state, return the reply (or None)."""
+        header = buffer[:4]
+        handler = getattr(self, "_handle_" + header.decode("ascii", "replace"), None)
+        if handler is None:
+            return None
+        return handler(buffer)
+
+    def _handle_CONN(self, buffer):
+        self.reply_port = struct.unpack_from(b"<H", buffer, 5)[0]
+        return struct.pack(b"<4sx", b"CONF")
+
+    def _handle_SIMU(self, buffer):
+        self.paused = buffer[5]
+
+    def _handle_GETD(self, buffer):
+        count = buffer[5]
+        offset = 6
+        reply = struct.pack(b"<4sxB", b"RESP", count)
+        for _ in range(count):
+            length = buffer[offset]
+            name = buffer[offset + 1:offset + 1 + length].decode()
+            offset += 1 + length
+            values = self.dref_values(name)
+            reply += struct.pack("<B{0:d}f".format(len(values)).encode(), len(values), *values)
+        return reply
+
+    def _handle_DREF(self, buffer):
+        offset = 5
+        while offset < len(buffer):
+            length = buffer[offset]
+            name = buffer[offset + 1:offset + 1 + length].decode()
+            offset += 1 + length
+            count = buffer[offset]
+            offset += 1
+            self.drefs[name] = list(struct.unpack_from("<{0:d}f".format(count).encode(), buffer, offset))
+            offset += 4 * count
+
+    def _handle_GETP(self, buffer):
+        ac = buffer[5]
+        if ac in self.posi:
+            values = self.posi[ac]
+        elif ac <= self.traffic:
+            lat, lon, alt, hdg, _ = self.aircraft_state(ac)
+            values = (lat, lon, alt, 0.0, 0.0, hdg, 1.0)
+        else:
+            return None
+        return struct.pack(b"<4sxBdddffff", b"POSI", ac, *values)
+
+    def _handle_POSI(self, buffer):
+        ac = buffer[5]
+        if len(buffer) >= 46:
+            values = struct.unpack_from(b"<dddffff", buffer, 6)
+        else:
+            values = struct.unpack_from(b"<7f", buffer, 6)
+        old = self.posi.get(ac, self.aircraft_state(ac)[:3] + (0.0, 0.0, 0.0, 1.0))
+        self.posi[ac] = tuple(o if abs(v + 998) < 1e-4 else v for o, v in zip(old, values))
+
+    def _handle_GETC(self, buffer):
+        ac = buffer[5]
+        values = self.ctrl.get(ac, (0.0, 0.0, 0.0, 0.0, 1, 0.0, 0.0))
+        elev, ail, rud, thr, gear, flaps, spdbrk = values
+        return struct.pack(b"<4sxffffbfBf", b"CTRL", elev, ail, rud, thr, int(gear), flaps, ac, spdbrk)
+
+    def _handle_CTRL(self, buffer):
+        elev, ail, rud, thr, gear, flaps, ac = struct.unpack_from(b"<ffffbfB", buffer, 5)
+        spdbrk = struct.unpack_from(b"<f", buffer, 27)[0] if len(buffer) >= 31 else -998
+        old = self.ctrl.get(ac, (0.0, 0.0, 0.0, 0.0, 1, 0.0, 0.0))
+        new = (elev, ail, rud, thr, gear, flaps, spdbrk)
+        self.ctrl[ac] = tuple(o if (v == -1 and i == 4) or abs(v + 998) < 1e-4 else v
+                              for i, (o, v) in enumerate(zip(old, new)))
+
+    def _handle_DATA(self, buffer):
+        for offset in range(5, len(buffer) - 35, 36):
+            row = struct.unpack_from(b"<I8f", buffer, offset)
+            self.data[row[0]] = row[1:]
+
+    def _handle_WYPT(self, buffer):
+        op, count = struct.unpack_from(b"<BB", buffer, 5)
+        values = struct.unpack_from("<{0:d}f".format(3 * count).encode(), buffer, 7)
+        points = [tuple(values[i:i + 3]) for i in range(0, len(values) - 2, 3)]
+        if op == 1:
+            self.waypoints.extend(points)
+        elif op == 2:
+            self.waypoints = [p for p in self.waypoints if p not in points]
+        elif op == 3:
+            self.waypoints = []
+
+    def _handle_TEXT(self, buffer):
+        length = buffer[13]
+        self.text = buffer[14:14 + length].decode(errors="replace")
+
+    def _handle_VIEW(self, buffer):
+        self.view = struct.unpack_from(b"<i", buffer, 5)[0]
+
+
+# ========================================================================
+# Standalone: python xpc_emulator.py --log logs/flight_log_20251121_134215.csv
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local XPC plugin emulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=49009)
+    parser.add_argument("--log", help="flight_log_*.csv to replay as ownship trajectory")
+    parser.add_argument("--latency", type=float, default=0.0, help="reply latency (ms)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency (ms)")
+    parser.add_argument("--loss", type=float, default=0.0, help="reply drop probability")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    trajectory = Trajectory.from_csv(args.log) if args.log else None
+    emulator = XPCEmulator(args.host, args.port, trajectory, args.latency,
+                           args.jitter, args.loss, seed=args.seed)
+    with emulator:
+        print(f"XPC emulator listening on {emulator.address[0]}:{emulator.address[1]}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print(f"\nreceived={emulator.received} replied={emulator.replied} "
+                  f"dropped={emulator.dropped}")